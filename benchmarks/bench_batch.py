@@ -0,0 +1,70 @@
+"""Throughput of pupforth-batch vs starting pupforth-run per script.
+
+Run like:
+
+    $ python -m benchmarks.bench_batch
+    $ python -m benchmarks.bench_batch --jobs 1000 --workers 4
+
+Writes --jobs small scripts to a temporary directory, then times running
+them all, both as one pupforth-run process per script (started
+--workers at a time) and as one pupforth-batch run, and reports jobs/sec
+for each. Both use the source cache for the standard library.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPT = """\
+: sum-to ( n -- sum ) 0 swap 0 do i + loop ;
+: job {n} sum-to . cr ;
+job
+"""
+
+
+def per_process(paths, workers):
+    def run(path):
+        subprocess.run([sys.executable, "-m", "pupforth.run", path],
+                       stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True)
+
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(run, paths))
+
+
+def batch(dirname, workers):
+    subprocess.run([sys.executable, "-m", "pupforth.batch", "-w", str(workers), dirname],
+                   stdout=subprocess.DEVNULL, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dirname:
+        paths = []
+        for n in range(args.jobs):
+            path = os.path.join(dirname, f"job{n:05}.f")
+            with open(path, "w") as f:
+                f.write(SCRIPT.format(n=100 + n))
+            paths.append(path)
+
+        print(f"{args.jobs} jobs, {args.workers} workers")
+        rates = []
+        for label, fn, arg in [("process per script", per_process, paths),
+                               ("pupforth-batch", batch, dirname)]:
+            start = time.perf_counter()
+            fn(arg, args.workers)
+            secs = time.perf_counter() - start
+            rates.append(args.jobs / secs)
+            print(f"{label:20} {secs:8.2f}s {rates[-1]:>10,.0f} jobs/sec")
+        print(f"speedup: x{rates[1] / rates[0]:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Cost of calling colon definitions from other colon definitions.
+
+Run like:
+
+    $ python -m benchmarks.bench_colon
+
+Times a three-deep chain of small colon words, called directly so that
+only the inner interpreter is measured (not parsing or `execute`), both
+threaded and JIT-compiled. Both run the same body: `poly` as the
+optimizer left it, with `quad` and `sq` inlined (shown by `see`).
+"""
+
+import contextlib
+import io
+import timeit
+
+from pupforth.main import State, process
+from pupforth.jit import JIT_THRESHOLD
+
+SOURCE = """
+: sq   dup * ;
+: quad sq sq ;
+: poly dup quad swap sq + 1 + ;
+"""
+N = 20_000
+
+
+def main():
+    st = State()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for line in SOURCE.splitlines():
+            process(st, line)
+    st.stk.push("poly")
+    st.find()
+    poly = st.stk.pop()
+
+    def call():
+        st.stk.push(3)
+        poly(st)
+        st.stk.pop()
+
+    for label, jit in [("threaded", 0), ("jit", JIT_THRESHOLD)]:
+        st.jit = jit
+        for _ in range(JIT_THRESHOLD):
+            call()      # warm up: JIT-compile now, not while timing
+        secs = min(timeit.repeat(call, number=N, repeat=5))
+        print(f"poly ({label}): {secs / N * 1e6:.2f} us/call, "
+              f"{N / secs:,.0f} calls/sec")
+
+
+if __name__ == "__main__":
+    main()
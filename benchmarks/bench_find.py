@@ -0,0 +1,43 @@
+"""Dictionary lookup cost as the dictionary grows.
+
+Run like:
+
+    $ python -m benchmarks.bench_find
+
+Lookup (both hits on the oldest word and misses, which is what every
+number literal pays) should stay flat from 100 to 100k words.
+"""
+
+import timeit
+
+from pupforth.main import State
+from pupforth.words import new_col
+
+SIZES = [100, 1_000, 10_000, 100_000]
+N = 100_000
+
+
+def bench_find(st, token):
+    def run():
+        st.stk.push(token)
+        if not st.find():
+            st.stk.pop()
+
+    return min(timeit.repeat(run, number=N, repeat=5)) / N * 1e9
+
+
+def main():
+    st = State()
+    defined = 0
+    print(f"{'words':>8} {'hit ns':>8} {'miss ns':>8}")
+    for size in SIZES:
+        while defined < size:
+            new_col(st.dictionary, f"bench-word-{defined}", [defined])
+            defined += 1
+        hit = bench_find(st, "bench-word-0")
+        miss = bench_find(st, "12345")
+        print(f"{size:>8} {hit:>8.0f} {miss:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Loading a file with `include` vs feeding it to process() by line.
+
+Run like:
+
+    $ python -m benchmarks.bench_include
+
+Writes a temporary file of N short lines and interprets it both ways,
+on a fresh State each time, and reports lines/sec.
+"""
+
+import os
+import tempfile
+import timeit
+
+from pupforth.main import State, process
+
+N = 50_000
+
+LINE = "1 2 + drop  \\ a comment\n"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lines.f")
+        with open(path, "w") as f:
+            f.write(LINE * N)
+
+        def by_line():
+            st = State()
+            with open(path) as f:
+                for line in f:
+                    process(st, line)
+
+        def include():
+            process(State(), f"include {path}")
+
+        for label, run in [("process", by_line), ("include", include)]:
+            secs = min(timeit.repeat(run, number=1, repeat=5))
+            print(f"{label:8} {N / secs:>12,.0f} lines/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Memory and garbage-collection cost of a large generated vocabulary.
+
+Run like:
+
+    $ python -m benchmarks.bench_memory
+
+Defines N colon words (with a docstring, a literal, a branch and a call
+each, like generated code tends to have) on top of the standard
+library, and reports bytes allocated per definition, objects the
+garbage collector tracks, and the time of a full collection.
+"""
+
+import gc
+import time
+import tracemalloc
+
+from pupforth.main import State, process_source
+
+from .run import STDLIB
+
+N = 10_000
+
+
+def source(n):
+    return ": w0 ;\n" + "\n".join(
+        f": w{i} [[ ( n -- n ) Word {i}. ]] dup {i} + swap over if drop then"
+        f" w{i - 1} ;" for i in range(1, n + 1))
+
+
+def main():
+    st = State()
+    with open(STDLIB) as f:
+        process_source(st, f.read())
+    src = source(N)
+
+    gc.collect()
+    objects = len(gc.get_objects())
+    tracemalloc.start()
+    process_source(st, src)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    objects = len(gc.get_objects()) - objects
+
+    start = time.perf_counter()
+    gc.collect()
+    secs = time.perf_counter() - start
+
+    print(f"{N:,} definitions: {size / 1e6:.2f} MB, {size / N:,.0f} B each, "
+          f"{objects:,} objects tracked, full collection {secs * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Output throughput of `.` and `emit`.
+
+Run like:
+
+    $ python -m benchmarks.bench_output
+
+Prints N numbers with `.` and N characters with `emit` from do loops,
+with stdout going to /dev/null (so not a TTY), and reports items/sec.
+"""
+
+import contextlib
+import os
+import timeit
+
+from pupforth.main import State, process
+
+N = 100_000
+
+SOURCE = f"""
+: nums {N} 0 do i . loop ;
+: chars {N} 0 do 42 emit loop ;
+"""
+
+
+def main():
+    st = State()
+    for line in SOURCE.splitlines():
+        process(st, line)
+
+    with open(os.devnull, "w") as null:
+        for label, src in [(".", "nums"), ("emit", "chars")]:
+            def run():
+                with contextlib.redirect_stdout(null):
+                    process(st, src)
+                    st.out.flush()    # what's still buffered is part of the cost
+
+            secs = min(timeit.repeat(run, number=1, repeat=5))
+            print(f"{label:6} {N / secs:>12,.0f} items/sec")
+
+
+if __name__ == "__main__":
+    main()
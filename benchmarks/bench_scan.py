@@ -0,0 +1,45 @@
+"""Per-token cost of the scanner on a large source buffer.
+
+Run like:
+
+    $ python -m benchmarks.bench_scan
+
+Tokenizes a generated ~1MB source buffer with `word`, the way the
+outer interpreter does, and reports the cost per token.
+"""
+
+import time
+
+from pupforth.main import State
+from pupforth.primitives import word
+from pupforth.exceptions import ParseError
+
+N_TOKENS = 200_000
+
+
+def source(n):
+    words = ["dup", "swap", "12345", "over", "+", "my-long-word-name", "-7"]
+    return " ".join(words[i % len(words)] for i in range(n)) + " "
+
+
+def main():
+    st = State()
+    st.inp_buffer = source(N_TOKENS)
+    best = None
+    for _ in range(3):
+        st.inp_pos = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                word(st)
+                st.stk.pop()
+        except ParseError:
+            pass
+        secs = time.perf_counter() - start
+        best = secs if best is None else min(best, secs)
+    print(f"{len(st.inp_buffer):,} chars, {N_TOKENS:,} tokens: "
+          f"{best / N_TOKENS * 1e9:.0f} ns/token")
+
+
+if __name__ == "__main__":
+    main()
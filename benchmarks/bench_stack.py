@@ -0,0 +1,53 @@
+"""List-backed Stack vs array-backed CellStack.
+
+Run like:
+
+    $ python -m benchmarks.bench_stack
+
+Reports push/pop throughput and memory per cell (measured with
+tracemalloc while holding N ints that aren't small-int cached).
+"""
+
+import timeit
+import tracemalloc
+
+from pupforth.stack import Stack, CellStack
+
+N = 100_000
+
+
+def throughput(stk):
+    push = stk.push
+    pop = stk.pop
+
+    def run():
+        for i in range(1000, 1100):
+            push(i)
+            push(i)
+            pop()
+        for _ in range(100):
+            pop()
+
+    secs = min(timeit.repeat(run, number=1000, repeat=5))
+    return 300_000 / secs
+
+
+def bytes_per_cell(make):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    stk = make()
+    for i in range(N):
+        stk.push(i * 1000)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / N
+
+
+def main():
+    for label, make in [("Stack", Stack), ("CellStack", lambda: CellStack(N))]:
+        print(f"{label:10} {throughput(make()):>12,.0f} ops/sec "
+              f"{bytes_per_cell(make):>6.1f} bytes/cell")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Context-switch rate of cooperative tasks.
+
+Run like:
+
+    $ python -m benchmarks.bench_tasks
+
+For each number of tasks, every task pauses PAUSES times in a do loop,
+and the main task runs them all to the end with `run-tasks`. Reports
+task switches per second, counting each turn a task gets as one.
+"""
+
+import time
+
+from pupforth.main import State, process
+
+SIZES = [1, 10, 100, 1_000, 10_000]
+SWITCHES = 200_000      # total per size, about
+
+
+def switch_rate(n_tasks):
+    pauses = max(1, SWITCHES // n_tasks)
+    st = State()
+    process(st, f": worker {pauses} 0 do pause loop ;")
+    for i in range(n_tasks):
+        process(st, f"task: t{i}  word worker find t{i} activate")
+    start = time.perf_counter()
+    process(st, "run-tasks")
+    secs = time.perf_counter() - start
+    # each task's last turn runs from its last pause to its end
+    return n_tasks * (pauses + 1) / secs
+
+
+def main():
+    print(f"{'tasks':>8} {'switches/sec':>14}")
+    for n in SIZES:
+        print(f"{n:>8} {switch_rate(n):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Vector words vs the equivalent scalar Forth loops.
+
+Run like:
+
+    $ python -m benchmarks.bench_vector
+
+Sums, fills and adds a buffer of N cells, both with a do loop of `@`,
+`!` and `+` and with the vector word, and reports cells/sec for each.
+Uses NumPy if it is installed, else the pure-Python fallback (shown in
+the output).
+"""
+
+import timeit
+
+from pupforth.main import State, process
+from pupforth.vector import numpy
+
+N = 10_000
+
+SOURCE = f"""
+{N} constant n
+create a n cells allot
+create b n cells allot
+: cell@ cells + @ ;
+: scalar-sum 0 n 0 do a i cell@ + loop ;
+: scalar-fill n 0 do 7 a i cells + ! loop ;
+: scalar-add n 0 do a i cell@ b i cell@ + a i cells + ! loop ;
+"""
+
+CASES = [
+    ("sum", "scalar-sum drop", "a n vsum drop"),
+    ("fill", "scalar-fill", "a n 7 vfill"),
+    ("add", "scalar-add", "a b a n v+"),
+]
+
+
+def main():
+    st = State()
+    for line in SOURCE.splitlines():
+        process(st, line)
+
+    print(f"backend: {'numpy' if numpy() else 'pure Python'}")
+    for label, scalar, vector in CASES:
+        rates = []
+        for src in scalar, vector:
+            number = 3 if src is scalar else 100
+            secs = min(timeit.repeat(
+                lambda: process(st, src), number=number, repeat=5))
+            rates.append(N * number / secs)
+        print(f"{label:6} scalar {rates[0]:>14,.0f} cells/sec   "
+              f"vector {rates[1]:>14,.0f} cells/sec   x{rates[1] / rates[0]:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Count adjacent pairs of ops run inside colon words, over the workloads.
+
+Run like:
+
+    $ python -m benchmarks.pairs              # all workloads
+    $ python -m benchmarks.pairs sieve --top 30
+
+This is what the superinstructions in pupforth/optimize.py were picked
+from. Every op of every colon word is wrapped to count how often it
+runs; a pair of neighbouring ops in a body is counted as often as the
+less-run of the two. Literals show as LIT. Each workload's pairs are
+scaled to fractions of its total, so no single workload dominates.
+"""
+
+import argparse
+import contextlib
+import os
+from collections import Counter
+
+from pupforth.main import State
+from pupforth.words import Word, PrimWord, ColWord
+
+from .run import STDLIB, feed
+from .workloads import WORKLOADS
+
+
+def _counting(op, counts, key):
+    def counted(st):
+        counts[key] += 1
+        return op(st)
+
+    return counted
+
+
+def _name(item):
+    return item.name if isinstance(item, Word) else "LIT"
+
+
+def instrument(st, counts):
+    """Wrap ops of every colon word to count runs by (id(word), index)."""
+
+    cw = st.latest
+    while cw:
+        if isinstance(cw, ColWord):
+            code = cw.compile(st)
+            cw._code = [_counting(op, counts, (id(cw), i))
+                        for i, op in enumerate(code)]
+            # counting ops must go through the ip loop to pass on jumps
+            cw._jumps = True
+        cw = cw.next_
+
+
+def body_pairs(st, counts):
+    """Pairs of ops in colon bodies, each with how often it ran."""
+
+    pairs = Counter()
+    cw = st.latest
+    while cw:
+        if isinstance(cw, ColWord):
+            body = cw.optimized if cw.optimized is not None else cw.words
+            for i in range(len(body) - 1):
+                a, b = body[i], body[i + 1]
+                if isinstance(a, PrimWord) and a.threader:
+                    continue    # a jump, or b is its operand
+                n = min(counts[(id(cw), i)], counts[(id(cw), i + 1)])
+                if n:
+                    pairs[(_name(a), _name(b))] += n
+        cw = cw.next_
+    return pairs
+
+
+def count_workload(make):
+    wl = make()
+    st = State()
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        with open(STDLIB) as f:
+            feed(st, f.read())
+        feed(st, wl.setup)
+        counts = Counter()
+        instrument(st, counts)
+        feed(st, wl.run)
+    return body_pairs(st, counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("workloads", nargs="*",
+                        help=f"workloads to count (default: all): {', '.join(WORKLOADS)}")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    for name in args.workloads:
+        if name not in WORKLOADS:
+            parser.error(f"no such workload: {name}")
+
+    share = Counter()
+    for name in args.workloads or WORKLOADS:
+        pairs = count_workload(WORKLOADS[name])
+        total = sum(pairs.values())
+        for pair, n in pairs.items():
+            share[pair] += n / total
+
+    scale = sum(share.values()) or 1
+    print(f"{'share':>7}  pair")
+    for (a, b), n in share.most_common(args.top):
+        print(f"{n / scale:>7.1%}  {a} {b}")
+
+
+if __name__ == "__main__":
+    main()
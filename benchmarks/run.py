@@ -0,0 +1,141 @@
+"""Run the Forth benchmark suite and record results.
+
+Run like:
+
+    $ python -m benchmarks.run                       # all workloads
+    $ python -m benchmarks.run arithmetic parsing    # just some
+    $ python -m benchmarks.run --compare benchmarks/results/OLD.json
+
+Every workload runs through pupforth.main.process on a fresh State,
+with the standard library loaded.
+For each we report ops/sec (best of --repeat runs), the time per token
+just to scan the source, and peak memory traced during one run.
+Results are written as JSON to benchmarks/results/, named by commit and
+time, so runs can be diffed across commits with --compare.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import pupforth
+from pupforth.main import State, process
+from pupforth.scanner import parse_name
+
+from .workloads import WORKLOADS
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+STDLIB = os.path.join(os.path.dirname(pupforth.__file__), "lib.f")
+
+
+def feed(st, source):
+    for line in source.splitlines():
+        process(st, line)
+
+
+def scan_ns_per_token(st, source):
+    st.inp_buffer = source
+    st.inp_pos = 0
+    n = 0
+    start = time.perf_counter()
+    while parse_name(st):
+        n += 1
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def run_workload(make, repeat):
+    wl = make()
+    st = State()
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        with open(STDLIB) as f:
+            feed(st, f.read())
+        feed(st, wl.setup)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            feed(st, wl.run)
+            secs = time.perf_counter() - start
+            best = secs if best is None else min(best, secs)
+
+        tracemalloc.start()
+        feed(st, wl.run)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "ops": wl.ops,
+        "secs": best,
+        "ops_per_sec": wl.ops / best,
+        "scan_ns_per_token": scan_ns_per_token(st, wl.run),
+        "peak_kb": peak / 1024,
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def report(results, old=None):
+    print(f"{'workload':20} {'ops/sec':>12} {'scan ns/tok':>12} {'peak KB':>10}"
+          + (f" {'vs old':>8}" if old else ""))
+    for name, r in results.items():
+        line = (f"{name:20} {r['ops_per_sec']:>12,.0f} "
+                f"{r['scan_ns_per_token']:>12.0f} {r['peak_kb']:>10,.0f}")
+        if old and name in old:
+            change = r["ops_per_sec"] / old[name]["ops_per_sec"] - 1
+            line += f" {change:>+8.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("workloads", nargs="*",
+                        help=f"workloads to run (default: all): {', '.join(WORKLOADS)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", metavar="JSON",
+                        help="earlier results file to compare against")
+    parser.add_argument("--no-save", action="store_true",
+                        help="don't write results file")
+    args = parser.parse_args()
+    for name in args.workloads:
+        if name not in WORKLOADS:
+            parser.error(f"no such workload: {name}")
+
+    results = {}
+    for name in args.workloads or WORKLOADS:
+        results[name] = run_workload(WORKLOADS[name], args.repeat)
+
+    old = None
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)["results"]
+    report(results, old)
+
+    if not args.no_save:
+        rev = commit()
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(
+            RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{rev}.json")
+        with open(path, "w") as f:
+            json.dump({
+                "commit": rev,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2)
+        print(f"\nwrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Startup-time regression check for the batch runner.
+
+Run like:
+
+    $ python -m benchmarks.startup
+
+Imports pupforth.run under `-X importtime` a few times and fails (exit
+status 1) if the best cumulative import time is over budget, or if any
+module only the interactive CLI needs got pulled in.
+tests/test_startup.py makes the same checks under pytest, with a
+looser budget.
+"""
+
+import os
+import subprocess
+import sys
+
+BUDGET_MS = 60
+RUNS = 5
+FORBIDDEN = {"click", "prompt_toolkit", "ctypes", "traceback", "pathlib"}
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile():
+    """Return (ms to import pupforth.run, names of modules imported)."""
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import pupforth.run"],
+        capture_output=True, text=True, check=True, cwd=ROOT)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative) / 1000
+    return modules["pupforth.run"], set(modules)
+
+
+def main():
+    profiles = [import_profile() for _ in range(RUNS)]
+    best = min(ms for ms, _ in profiles)
+    loaded = {name.split(".")[0] for name in profiles[0][1]}
+    bad = FORBIDDEN & loaded
+
+    print(f"import pupforth.run: {best:.1f}ms (budget {BUDGET_MS}ms)")
+    if bad:
+        print(f"FAIL: batch runner imports {', '.join(sorted(bad))}")
+    if best > BUDGET_MS:
+        print("FAIL: over budget")
+    return 1 if bad or best > BUDGET_MS else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Forth workloads for the benchmark runner.
+
+Each workload is a function returning a Workload: Forth source to set
+up (not timed), source to run (timed) and how many "ops" one run does,
+so results come out as ops/sec. Most runs are generated as unrolled
+source, to time the outer interpreter; the loop workloads time
+compiled control flow instead.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class Workload:
+    setup: str
+    run: str
+    ops: int
+
+
+WORKLOADS = {}
+
+
+def workload(func):
+    WORKLOADS[func.__name__.replace("_", "-")] = func
+    return func
+
+
+def lines(tokens, per_line=50):
+    """Join tokens into lines of source, per_line tokens each."""
+
+    return "\n".join(
+        " ".join(tokens[i:i + per_line]) for i in range(0, len(tokens), per_line))
+
+
+@workload
+def arithmetic():
+    """Tight stack arithmetic at the outer interpreter."""
+
+    n = 5_000
+    return Workload("", lines("1 2 + 3 * 4 xor 5 swap - drop".split() * n), 11 * n)
+
+
+@workload
+def nested_calls():
+    """Colon words calling colon words; ops are colon-word calls."""
+
+    depth = 10
+    # noinline, or the optimizer would flatten the lot
+    setup = [": c0 1 drop ; noinline"]
+    setup += [f": c{i} c{i - 1} c{i - 1} ; noinline" for i in range(1, depth + 1)]
+    n = 20
+    return Workload("\n".join(setup), lines([f"c{depth}"] * n), n * (2 ** (depth + 1) - 1))
+
+
+@workload
+def dictionary_lookup():
+    """Finding words in a dictionary of 5000 user words."""
+
+    size = 5_000
+    setup = "\n".join(f": w{i} ;" for i in range(size))
+    tokens = [f"w{(i * 7919) % size}" for i in range(20_000)]
+    return Workload(setup, lines(tokens), len(tokens))
+
+
+@workload
+def parsing():
+    """Scanning comments, long names and literals; ops are tokens."""
+
+    unit = "( a comment to skip ) a-rather-long-word-name 123 drop".split()
+    setup = ": a-rather-long-word-name ;"
+    n = 5_000
+    # comments can't span lines, so keep whole units on each line
+    source = lines(unit * n, per_line=6 * len(unit))
+    return Workload(setup, source + " \\ trailing comment", len(unit) * n)
+
+
+@workload
+def variables():
+    """Fetching and storing a variable."""
+
+    n = 5_000
+    return Workload("variable v", lines("v @ 1 + v !".split() * n), 5 * n)
+
+
+@workload
+def literal_compile():
+    """Compiling literal-heavy definitions (data tables)."""
+
+    n_defs, n_lits = 20, 1_000
+    tokens = []
+    for d in range(n_defs):
+        tokens += [":", f"table{d}", *map(str, range(n_lits)), ";"]
+    return Workload("", lines(tokens), n_defs * n_lits)
+
+
+@workload
+def nested_loops():
+    """Nested do loops counting; ops are inner iterations."""
+
+    outer, inner = 1_000, 100
+    setup = f": count 0 {outer} 0 do {inner} 0 do 1+ loop loop drop ;"
+    return Workload(setup, "count", outer * inner)
+
+
+@workload
+def sieve():
+    """Sieve of Eratosthenes over a byte array; ops are flags sieved."""
+
+    size = 8190
+    setup = f"""
+{size} constant size
+create flags size allot
+: sieve 0 size 0 do 1 flags i + c! loop
+  size 0 do flags i + c@ if
+    i double 3 + dup i + begin dup size < while
+      0 over flags + c! over + repeat 2drop 1+
+  then loop ;
+"""
+    return Workload(setup.strip(), "sieve drop", size)
+
+
+@workload
+def recursion():
+    """Recursive fib, with if/else; ops are calls."""
+
+    n = 18
+    setup = ": fib dup 2 < if exit then dup 1- fib swap 2- fib + ;"
+    a, b = 0, 1
+    for _ in range(n + 1):
+        a, b = b, a + b
+    return Workload(setup, f"{n} fib drop", 2 * a - 1)
+
+
+@workload
+def deep_recursion():
+    """Non-tail recursion far deeper than Python's recursion limit."""
+
+    depth = 20_000
+    setup = ": sum dup if dup 1- sum + then ;"
+    return Workload(setup, f"{depth} sum drop", depth)
@@ -0,0 +1,238 @@
+"""Batch executor: run many Forth scripts on a pool of forked workers.
+
+Run like:
+
+    $ pupforth-batch jobs/                        # every .f file in jobs/
+    $ pupforth-batch --manifest jobs.txt --timeout 5 > results.jsonl
+    $ python3 -m pupforth.batch --prelude common.f a.f b.f
+
+The standard library (or an image) and any preludes are loaded once, in
+the parent, which then forks the workers (one per core by default), so
+they start with all of that in memory. Each job runs on a State spawned
+from the loaded one (see State.spawn), with its own stacks, data space,
+dictionary and output, so nothing a job does is seen by later ones.
+(The words loaded before forking are shared, so once a job ends, what
+it changed on them -- flags, inlining, optimized, threaded or JIT code,
+profiling or tracing wrappers -- is put back as it was.)
+
+A job stops at its first error, like a file given to pupforth-run. For
+each job, a line of JSON is written as it finishes::
+
+    {"job": "jobs/a.f", "exit": 0, "secs": 0.0012, "output": "3 ", "error": null}
+
+exit is 0 if the job ran to its end (or `bye`), 1 if it had an error
+and 124 if it ran past --timeout seconds; either way, its worker goes on
+to the next job. Exit status is 1 if any job didn't exit 0.
+
+Manifests list a script per line (relative to the manifest), skipping
+blank lines and lines starting with #. Needs fork: Linux or macOS.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from array import array
+
+from . import cache, profiler, trace
+from .exceptions import ForthError, ForthBye, Timeout
+from .image import chain_of, load_image
+from .main import process_source, State
+from .output import Output
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_TIMEOUT = 124      # as timeout(1)
+
+_base = None        # loaded State jobs spawn from; workers inherit it
+_saved = None       # (_base, how its words were) before any job ran
+_timeout = 0
+_running = False    # only interrupt while a job is running
+
+
+def _alarm(signum, frame):
+    if _running:
+        raise Timeout(f"Timed out after {_timeout}s")
+
+
+def _init_worker():
+    signal.signal(signal.SIGALRM, _alarm)
+
+
+def _copy(val):
+    """Copy of val if it's a container a job could change in place."""
+
+    if isinstance(val, array):
+        return val[:]
+    if isinstance(val, (set, list, dict)):
+        return val.copy()
+    return val
+
+
+def _save_words():
+    """Record every field of the base State's words, before jobs change them."""
+
+    global _saved
+    if _saved is not None and _saved[0] is _base:
+        return
+    words = []
+    for w in chain_of(_base):
+        fields = {}
+        for cls in type(w).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if name != "xts":   # the dictionary's table, truncated below
+                    fields[name] = _copy(getattr(w, name))
+        words.append((w, fields))
+    _saved = (_base, words, len(_base.dictionary.xts))
+
+
+def _restore_words(st):
+    """Stop job's profiling/tracing, and put shared words back as they were."""
+
+    profiler.stop(st)
+    trace.stop(st)
+    _, words, n_xts = _saved
+    for w, fields in words:
+        for name, val in fields.items():
+            setattr(w, name, _copy(val))
+    # ops the optimizer made for shared words took tokens in the base table
+    del _base.dictionary.xts[n_xts:]
+
+
+def run_job(path):
+    """Run script at path on a State of its own; return its summary."""
+
+    global _running
+    _save_words()
+    out = io.StringIO()
+    st = _base.spawn(Output(out))
+    exit_, error = EXIT_OK, None
+    start = time.perf_counter()
+    if _timeout:
+        signal.setitimer(signal.ITIMER_REAL, _timeout)
+    try:
+        try:
+            _running = True
+            with open(path) as f:
+                process_source(st, f.read(), path, show_traceback=False)
+        finally:
+            _running = False
+            st.out.flush()
+            _restore_words(st)
+    except ForthBye:
+        pass
+    except Timeout as e:
+        exit_, error = EXIT_TIMEOUT, str(e)
+    except (ForthError, OSError, UnicodeDecodeError) as e:
+        exit_, error = EXIT_ERROR, str(e)
+    except Exception as e:      # eg RecursionError: report it, keep the worker
+        exit_, error = EXIT_ERROR, f"{type(e).__name__}: {e}"
+    signal.setitimer(signal.ITIMER_REAL, 0)
+    return {
+        "job": path,
+        "exit": exit_,
+        "secs": round(time.perf_counter() - start, 6),
+        "output": out.getvalue(),
+        "error": error,
+    }
+
+
+def find_jobs(paths, manifest=None):
+    """Scripts to run: files as given, .f files in directories, sorted."""
+
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            jobs.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith(".f")))
+        else:
+            jobs.append(path)
+    if manifest:
+        root = os.path.dirname(manifest)
+        with open(manifest) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    jobs.append(os.path.join(root, line))
+    return jobs
+
+
+def load_base(no_stdlib=False, image=None, preludes=(), use_cache=True):
+    """State with the standard library (or image) and preludes loaded."""
+
+    st = State()
+    files = list(preludes)
+    if image:
+        load_image(st, image)
+    elif not no_stdlib:
+        files.insert(0, os.path.join(os.path.dirname(__file__), "lib.f"))
+    try:
+        for path in files:
+            with open(path) as f:
+                cache.load_source(st, f.read(), use_cache, path)
+    finally:
+        st.out.flush()      # to wherever stdout is now, not the workers'
+    return st
+
+
+def run_batch(base, jobs, workers=None, timeout=0):
+    """Yield summaries of jobs, as they finish, run on forked workers."""
+
+    global _base, _timeout
+    _base, _timeout = base, timeout
+    workers = workers or os.cpu_count() or 1
+    # loaded words stay shared with the workers rather than being copied
+    # as the collector touches them
+    gc.freeze()
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(workers, initializer=_init_worker) as pool:
+        chunk = max(1, min(16, len(jobs) // (workers * 4)))
+        yield from pool.imap_unordered(run_job, jobs, chunk)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pupforth-batch", description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*",
+                        help="scripts, or directories of .f scripts")
+    parser.add_argument("--manifest", help="file listing scripts to run")
+    parser.add_argument("--prelude", action="append", default=[],
+                        help="file to load before forking (repeatable)")
+    parser.add_argument("--workers", "-w", type=int,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--timeout", type=float, default=0,
+                        help="seconds each job may run (default: no limit)")
+    parser.add_argument("--no-stdlib", action="store_true")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--image", help="start from saved image")
+    parser.add_argument("--output", "-o", type=argparse.FileType("w"),
+                        default=sys.stdout, help="JSON lines file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = find_jobs(args.paths, args.manifest)
+        # whatever the prelude prints isn't part of any job
+        with contextlib.redirect_stdout(sys.stderr):
+            base = load_base(args.no_stdlib, args.image, args.prelude,
+                             use_cache=not args.no_cache)
+    except (OSError, ForthError, ForthBye) as e:
+        print(f"pupforth-batch: {e}", file=sys.stderr)
+        return 2
+
+    status = 0
+    for summary in run_batch(base, jobs, args.workers, args.timeout):
+        print(json.dumps(summary), file=args.output, flush=True)
+        if summary["exit"] != EXIT_OK:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
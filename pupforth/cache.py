@@ -0,0 +1,203 @@
+"""Cache of compiled source files.
+
+Loading a file through load_source() records what it did -- the words
+it defined and the data space it laid down -- and saves that (in the
+same encoding as images) under a key made of the interpreter version,
+a digest of the state it started from, and the file's contents. The
+digest covers every word (name, doc, flags, execution token and body)
+and data space up to `here` (which holds BASE), as a file can compute
+things from any of them while it loads.
+Loading the same file onto the same dictionary again replays that
+instead of interpreting the source.
+
+Only files whose whole effect is new words and new data space can be
+replayed, so a file is not cached if loading it printed anything, left
+the stacks or compile flags changed, made tasks, included files,
+touched earlier words (hide, forget, docs, inline), wrote to memory
+below where it started, turned the JIT, profiling or tracing on or
+off, or ran a word that reads or writes files (see State.effects).
+
+An entry that can't be replayed (cut short, or from an older format)
+is undone, deleted and the file interpreted instead.
+"""
+
+import contextlib
+import hashlib
+import marshal
+import os
+
+from . import __version__
+from .exceptions import ForthError
+from .main import process_source
+from .image import chain_of, dump_words, load_words, encode, decode
+from .words import Word, ColWord
+
+# os.path rather than pathlib, to keep pupforth-run's startup down
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "pupforth")
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+stats = {"hits": 0, "misses": 0, "uncacheable": 0}
+
+
+def _key(st, chain, text):
+    """Key for loading text onto st: what loading it could depend on."""
+
+    h = hashlib.sha256(__version__.encode())
+    dictionary = st.dictionary
+    for w in chain:
+        h.update(f"\0{w.name}\0{w.doc}\0{w.xt}\0{dictionary.is_hidden(w)}"
+                 f"{w.compilation}{w.immediate}".encode())
+        if isinstance(w, ColWord):
+            h.update(f"{w.inline}\0{w.consts!r}\0".encode())
+            h.update(w.body)
+    mem = st.memory
+    h.update(f"\0{len(dictionary.xts)}\0{mem.here}\0".encode())
+    h.update(mem.mv[:mem.here])
+    for a, v in sorted(mem.boxed.items()):
+        if a < mem.here:
+            v = f"xt {v.xt}" if isinstance(v, Word) else repr(v)
+            h.update(f"\0{a}\0{v}".encode())
+    h.update(b"\0")
+    h.update(text.encode())
+    return h.hexdigest()
+
+
+def _snapshot(st, chain, here):
+    """Everything a cacheable file must leave alone."""
+
+    mem = st.memory
+    return (
+        [(st.dictionary.is_hidden(w), w.doc, getattr(w, "inline", None))
+         for w in chain],
+        bytes(mem.mv[:here]),
+        {a: id(v) for a, v in mem.boxed.items() if a < here},
+        [id(x) for x in st.stk],
+        [id(x) for x in st.ret_stack],
+        (st.compiling, st.force_immediate),
+        len(st.tasks),
+        len(st.included),
+        st.out.written,
+        (st.jit, id(st.profiler), id(st.last_profile),
+         id(st.tracer), id(st.last_trace)),
+        st.effects,
+    )
+
+
+def _replay(st, chain, entry):
+    """Load what entry recorded; if it can't be, undo that, return False."""
+
+    dictionary = st.dictionary
+    mem = st.memory
+    old_latest, start, old_xts = dictionary.latest, mem.here, len(dictionary.xts)
+    try:
+        words = load_words(dictionary, entry["words"], chain, entry["xts"])
+        mem.allot(entry["here"] - start)
+        mem.mv[start:mem.here] = entry["data"]
+        every = [*chain, *words]
+        for a, v in entry["boxed"].items():
+            mem.boxed[a] = decode(v, every)
+    except (KeyError, IndexError, TypeError, ValueError, ForthError):
+        first = None
+        cur = dictionary.latest
+        while cur is not old_latest:
+            first, cur = cur, cur.next_
+        if first:
+            dictionary.unlink_through(first)
+        del dictionary.xts[old_xts:]
+        for a in [a for a in mem.boxed if a >= start]:
+            del mem.boxed[a]
+        mem.here = start
+        return False
+    return True
+
+
+def _record(st, chain, before, old_latest, old_here):
+    """Return cache entry for what was just loaded, or None if we can't."""
+
+    new = []
+    cur = st.latest
+    while cur is not old_latest:
+        if cur is None:
+            return None     # forgot past where we started
+        new.append(cur)
+        cur = cur.next_
+    new.reverse()
+
+    mem = st.memory
+    if mem.here < old_here or _snapshot(st, chain, old_here) != before:
+        return None
+
+    ids = {id(w): i for i, w in enumerate([*chain, *new])}
+    return {
+        "words": dump_words(st.dictionary, new, ids),
+        "here": mem.here,
+        "xts": len(st.dictionary.xts),
+        "data": bytes(mem.mv[old_here:mem.here]),
+        "boxed": {a: encode(v, ids)
+                  for a, v in mem.boxed.items() if a >= old_here},
+    }
+
+
+def _evict():
+    """Drop least-recently-used entries until cache fits."""
+
+    entries = []
+    with os.scandir(CACHE_DIR) as it:
+        for e in it:
+            if e.name.endswith(".fc"):
+                stat = e.stat()
+                entries.append((stat.st_mtime, stat.st_size, e.path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= MAX_CACHE_BYTES:
+            break
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+        total -= size
+
+
+def load_source(st, text, use_cache=True, filename=None):
+    """Interpret text of a whole file, replaying it from cache if we can.
+
+    filename is the file's path, which files it includes are found near.
+    """
+
+    if not use_cache:
+        return process_source(st, text, filename)
+
+    chain = chain_of(st)
+    path = os.path.join(CACHE_DIR, f"{_key(st, chain, text)}.fc")
+    try:
+        with open(path, "rb") as f:
+            entry = marshal.loads(f.read())
+    except (OSError, ValueError, EOFError, TypeError):
+        entry = None
+    if entry is not None:
+        if _replay(st, chain, entry):
+            stats["hits"] += 1
+            with contextlib.suppress(OSError):
+                os.utime(path)
+            return
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+
+    stats["misses"] += 1
+    old_latest, old_here = st.latest, st.memory.here
+    before = _snapshot(st, chain, old_here)
+    process_source(st, text, filename)
+
+    entry = _record(st, chain, before, old_latest, old_here)
+    if entry is None:
+        stats["uncacheable"] += 1
+        return
+
+    with contextlib.suppress(OSError, ValueError):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            marshal.dump(entry, f)
+        os.replace(tmp, path)
+        _evict()
@@ -13,11 +13,13 @@ from pathlib import Path
 from pupforth import __version__
 
 import click
-from prompt_toolkit import prompt, HTML
-from prompt_toolkit.history import FileHistory
 
 from .exceptions import ForthError, ForthBye
 from .main import process, State
+from .stack import Stack, CellStack
+from .jit import JIT_THRESHOLD
+from .image import load_image
+from . import cache, profiler, trace
 from .utils import RED, RESET, YELLOW, BLUE
 
 
@@ -25,22 +27,46 @@ from .utils import RED, RESET, YELLOW, BLUE
 @click.version_option(__version__)
 @click.option("--quiet", "-q", is_flag=True, default=False, help="Omit greet/exit text.")
 @click.option("--no-stdlib", help="Don't load standard library",  is_flag=True, default=False)
+@click.option("--jit", help="JIT-compile hot colon words.", is_flag=True, default=False)
+@click.option("--stacks", type=click.Choice(["list", "cells"]), default="list",
+              help="Stack implementation: Python lists (fastest) or arrays of "
+                   "64-bit cells (ints take less memory, about half as fast).")
+@click.option("--image", type=click.Path(exists=True, dir_okay=False),
+              help="Start from saved image instead of standard library.")
+@click.option("--no-cache", is_flag=True, default=False,
+              help="Don't use (or fill) cache of compiled source files.")
+@click.option("--cache-stats", is_flag=True, default=False,
+              help="Show cache hits/misses at exit.")
+@click.option("--profile", is_flag=True, default=False,
+              help="Profile words; show hot words at exit.")
+@click.option("--profile-stacks", type=click.Path(dir_okay=False),
+              help="Profile words; write collapsed stacks to file at exit.")
+@click.option("--trace", "trace_file", type=click.File("wb"),
+              help="Trace execution, streaming records to file.")
 @click.argument("forth_files", type=click.File("r"), nargs=-1)
-def cli(forth_files, no_stdlib, quiet):
+def cli(forth_files, no_stdlib, quiet, jit, stacks, image, no_cache, cache_stats,
+        profile, profile_stacks, trace_file):
     if not quiet:
         print(f"{YELLOW}PupForth {__version__}{RESET}")
         print(f"See list of words with `words` or `words+`.")
         print(f"Get help on individual word like `help dup`\n")
 
-    st = State()
-    if not no_stdlib:
+    st = State(CellStack if stacks == "cells" else Stack)
+    if jit:
+        st.jit = JIT_THRESHOLD
+    if profile or profile_stacks:
+        profiler.start(st)
+    if trace_file:
+        trace.start(st, trace_file)
+    if image:
+        load_image(st, image)
+    elif not no_stdlib:
         std_lib = Path(__file__).parent / "lib.f"
         forth_files = (open(std_lib), *forth_files)
     try:
         for f in forth_files:
             try:
-                for line in f:
-                    process(st, line)
+                cache.load_source(st, f.read(), not no_cache, f.name)
             except ForthError as e:
                 print(f"{RED}{e} --- rest of file ignored{RESET}")
 
@@ -55,6 +81,9 @@ def cli(forth_files, no_stdlib, quiet):
 
         # else a real live human at a terminal!
         else:
+            from prompt_toolkit import prompt, HTML
+            from prompt_toolkit.history import FileHistory
+
             while True:
                 line = prompt(
                     HTML("<ansiyellow><b>> </b></ansiyellow>"),
@@ -66,8 +95,22 @@ def cli(forth_files, no_stdlib, quiet):
                     print(f"{RED}{e}{RESET}")
 
     except (EOFError, KeyboardInterrupt, ForthBye):
+        st.out.flush()
         if not quiet:
             print(f"{BLUE}Goodbye!{RESET}")
+    finally:
+        st.out.flush()
+        trace.stop(st)
+        if st.profiler:
+            profiler.stop(st)
+            if profile:
+                st.last_profile.report()
+            if profile_stacks:
+                st.last_profile.write_stacks(profile_stacks)
+        if cache_stats:
+            print(f"cache: {cache.stats['hits']} hits, "
+                  f"{cache.stats['misses']} misses "
+                  f"({cache.stats['uncacheable']} uncacheable)")
 
 
 if __name__ == "__main__":
@@ -6,9 +6,17 @@ class StackUnderflow(ForthError):
     """Attempted to pop from empty stack."""
 
 
+class StackOverflow(ForthError):
+    """Attempted to push onto full stack."""
+
+
 class ParseError(ForthError):
     """Parsing problem."""
 
 
 class ForthBye(Exception):  # <-- not a subclass!
     """Exit program."""
+
+
+class Timeout(ForthError):
+    """Ran past time limit."""
@@ -0,0 +1,187 @@
+"""Saving and loading system images.
+
+An image is the whole dictionary (chain order, flags, docs, compiled
+bodies) plus data space, so starting from one skips reparsing lib.f.
+
+Layout::
+
+    MAGIC | header length (u64) | marshal'd header | pad to page | data
+
+The header holds the words, oldest first, with their execution tokens
+and bodies as defined (they are optimized again on load). Words get
+back the same tokens, with any left unused (by forgotten words, or ops
+the optimizer made) kept unused, so tokens stored in data space still
+name the same words. Primitives are saved by name and looked
+up in new_word.prims on load, so images survive restarts (but not a
+primitive being renamed). They are shared with every other dictionary,
+so only the flags of colon words are restored. Colon bodies and boxed memory are
+lists of ints/strs, with word references as 1-tuples of their index in
+the word list. Data space is mmap'd copy-on-write straight from the
+file, so it is paged in as used rather than read up front.
+"""
+
+import marshal
+import mmap
+import struct
+
+from . import __version__
+from .exceptions import ForthError
+from .memory import DataSpace
+from .optimize import optimize
+from .primitives import word
+from .words import new_word, Dictionary, PrimWord, ColWord, PRIMITIVES
+
+MAGIC = b"PUPFIMG2"
+_LEN = struct.Struct("<Q")
+
+
+def encode(val, ids):
+    if isinstance(val, (PrimWord, ColWord)):
+        try:
+            return (ids[id(val)],)
+        except KeyError:
+            raise ForthError(f"Cannot save reference to forgotten {val}")
+    if type(val) in (int, str):
+        return val
+    raise ForthError(f"Cannot save value: {val!r}")
+
+
+def decode(val, words):
+    return words[val[0]] if type(val) is tuple else val
+
+
+def chain_of(st):
+    """List of all words in dictionary, oldest first."""
+
+    chain = []
+    cur = st.latest
+    while cur:
+        chain.append(cur)
+        cur = cur.next_
+    chain.reverse()
+    return chain
+
+
+def dump_words(dictionary, words, ids):
+    """Encode words; ids maps id(word) -> index for words they refer to."""
+
+    out = []
+    for w in words:
+        flags = (dictionary.is_hidden(w), w.compilation, w.immediate)
+        if isinstance(w, PrimWord):
+            out.append(("p", w.name, w.doc, flags, w.xt))
+        else:
+            body = [encode(x, ids) for x in w.words]
+            out.append(("c", w.name, w.doc, flags, w.xt, body, w.inline))
+    return out
+
+
+def load_words(dictionary, entries, known=(), size=0):
+    """Decode words and link them into dictionary.
+
+    References index into known + the decoded words. Words get back
+    their execution tokens, and tokens up to size are kept for them
+    (rather than for ops the optimizer makes).
+    """
+
+    words = []
+    bodies = []
+    for kind, name, doc, (hidden, *flags), xt, *body in entries:
+        if kind == "p":
+            try:
+                w = new_word.prims[name]
+            except KeyError:
+                raise ForthError(f"Image needs unknown primitive: {name}")
+            if w.next_ is not dictionary.latest:
+                raise ForthError(f"Image has primitives out of order: {name}")
+            if w.xt != xt:
+                raise ForthError(f"Image has primitive with other token: {name}")
+        else:
+            w = ColWord(dictionary.latest, name, doc, [], *flags, dictionary.xts)
+            w.inline = body[1] if len(body) > 1 else None
+            bodies.append(body[0])
+            dictionary.register(w, xt)
+        dictionary.link(w)
+        if hidden:
+            dictionary.hide(w)
+        words.append(w)
+    dictionary.xts.extend([None] * (size - len(dictionary.xts)))
+    # bodies can only refer to words that exist once all are made
+    every = [*known, *words]
+    for w, body in zip([w for w in words if isinstance(w, ColWord)], bodies):
+        w.words = [decode(x, every) for x in body]
+        optimize(w)
+    return words
+
+
+def save_image(st, path):
+    """Write dictionary and data space of st to path."""
+
+    chain = chain_of(st)
+    ids = {id(w): i for i, w in enumerate(chain)}
+    words = dump_words(st.dictionary, chain, ids)
+
+    mem = st.memory
+    header = marshal.dumps({
+        "version": __version__,
+        "here": mem.here,
+        "xts": len(st.dictionary.xts),
+        "boxed": {a: encode(v, ids) for a, v in mem.boxed.items()},
+        "words": words,
+    })
+    size = mem.here + (-mem.here % 8)
+    start = len(MAGIC) + _LEN.size + len(header)
+    pad = -start % mmap.PAGESIZE
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_LEN.pack(len(header)))
+        f.write(header)
+        f.write(bytes(pad))
+        f.write(mem.mv[:size])
+
+
+def load_image(st, path):
+    """Replace dictionary and data space of st with image at path."""
+
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except ValueError:
+            raise ForthError(f"Not an image: {path}")
+    if mm[:len(MAGIC)] != MAGIC:
+        raise ForthError(f"Not an image: {path}")
+    (hlen,) = _LEN.unpack_from(mm, len(MAGIC))
+    start = len(MAGIC) + _LEN.size
+    header = marshal.loads(mm[start:start + hlen])
+    if header["version"] != __version__:
+        raise ForthError(
+            f"Image is from version {header['version']}, not {__version__}")
+
+    dictionary = Dictionary(xts=PRIMITIVES.xts)
+    words = load_words(dictionary, header["words"], size=header["xts"])
+    st.dictionary = dictionary
+
+    data = start + hlen
+    data += -data % mmap.PAGESIZE
+    boxed = {a: decode(v, words) for a, v in header["boxed"].items()}
+    st.memory = DataSpace.from_buffer(
+        memoryview(mm)[data:], header["here"], boxed)
+
+
+@new_word("save-image")
+def save_image_(st):
+    """( -- ) Save image to file named by next word."""
+
+    word(st)
+    st.effects += 1
+    save_image(st, st.stk.pop())
+
+
+@new_word("load-image")
+def load_image_(st):
+    """( -- ) Load image from file named by next word."""
+
+    word(st)
+    st.effects += 1
+    load_image(st, st.stk.pop())
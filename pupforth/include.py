@@ -0,0 +1,80 @@
+"""Including files: include, included, require, required.
+
+    include util.f          \\ interpret util.f here
+    require util.f          \\ ... unless it's been included already
+
+An included file is read whole, with one read, and interpreted a line
+at a time from memory (see scanner.Source); when it ends, input goes
+back to just after the word that included it. Files can include files,
+up to INCLUDE_MAX deep.
+
+A relative path is looked for first next to the file doing the
+including, then in the current directory. Files are told apart by
+device and inode, so `require` knows a file however it's named.
+"""
+
+import os
+
+from .exceptions import ForthError
+from .primitives import word
+from .scanner import Source, interpret_source
+from .words import new_word
+
+INCLUDE_MAX = 64    # deepest nesting of includes
+
+
+def _resolve(st, path):
+    """Path to open for path, as named in the current source."""
+
+    if not os.path.isabs(path) and st.source and st.source.path:
+        near = os.path.join(os.path.dirname(st.source.path), path)
+        if os.path.exists(near):
+            return near
+    return path
+
+
+def include_file(st, path, once=False):
+    """Interpret file at path (if once, only if not included before)."""
+
+    if len(st.sources) >= INCLUDE_MAX:
+        raise ForthError(f"Includes nested too deep: {path}")
+    path = _resolve(st, path)
+    try:
+        with open(path) as f:
+            stat = os.fstat(f.fileno())
+            key = (stat.st_dev, stat.st_ino)
+            if once and key in st.included:
+                return
+            text = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        raise ForthError(f"Cannot include {path}: {e}")
+    st.included.append(key)
+    interpret_source(st, Source(text, path))
+
+
+@new_word("included")
+def included(st):
+    """( str -- ) Interpret file named str."""
+    include_file(st, st.stk.pop())
+
+
+@new_word("include")
+def include(st):
+    """( -- ) Interpret file named next: `include util.f`."""
+
+    word(st)
+    included(st)
+
+
+@new_word("required")
+def required(st):
+    """( str -- ) Interpret file named str, unless already included."""
+    include_file(st, st.stk.pop(), once=True)
+
+
+@new_word("require")
+def require(st):
+    """( -- ) Interpret file named next, unless already included."""
+
+    word(st)
+    required(st)
@@ -0,0 +1,314 @@
+"""JIT tier: turn hot colon words into straight-line Python functions.
+
+When JIT is on, each ColWord counts its calls; once it passes the
+threshold, its body (as optimized, see optimize.py) is turned into
+Python source and compiled. The
+generated function keeps stack items in locals as long as it can,
+inlines the simplest primitives, and only touches `st.stk` when it has
+to call another word (or at the end). Calls to colon words are still
+made by the inner interpreter, between the generated functions.
+
+For example, `: poly 3 * 1 + ;` becomes::
+
+    def jit_poly(st):
+        t0 = st.stk.pop()
+        t1 = 3 * t0
+        t2 = 1 + t1
+        st.stk.push(t2)
+
+Words with control flow keep their threaded code, with each run of
+straight-line code between jumps, jump targets and calls replaced by a
+generated function that returns the index to go on at. If the run ends
+in a branch (`0branch`, `branch`, `exit` and the superinstructions for
+`dup 0branch` and `< 0branch`), the function takes it itself, so the
+flag it tests never goes through `st.stk`. Loops (do ... loop), `pause`
+and `stop` stay threaded, as do runs of a single word, which are
+already one call. So `: fib dup 2 < if exit then dup 1- fib swap 2- fib
++ ;` gets a function for `dup 2 < if exit then` (returning the end or
+the index after it), and one each for `dup 1-`, `swap 2-` and `+`.
+"""
+
+import re
+
+from .primitives import (
+    dup, drop, swap, rot, add, mul, negate, and_, or_, invert, xor, bsl, bsr,
+    equals, less, greater, zero_eq, zero_less)
+from .primitives import zero_branch, branch, exit_
+from .optimize import SUPER, BRANCH_SUPER
+from .words import new_word, PrimWord, ColWord, LIT_OPS, _call
+
+JIT_THRESHOLD = 50
+
+# primitive's function -> (inputs, outputs); outputs that are just an
+# input reuse that local, anything else is assigned to a new one.
+# Operand order matches the primitives (eg `add` is "top + second");
+# {a} is the second item and {b} the top, so `<` is "{a} < {b}".
+INLINE = {
+    dup.code: ("a", ["{a}", "{a}"]),
+    drop.code: ("a", []),
+    swap.code: ("a b", ["{b}", "{a}"]),
+    rot.code: ("a b c", ["{b}", "{c}", "{a}"]),
+    add.code: ("a b", ["{b} + {a}"]),
+    mul.code: ("a b", ["{b} * {a}"]),
+    negate.code: ("a", ["-{a}"]),
+    and_.code: ("a b", ["{a} & {b}"]),
+    or_.code: ("a b", ["{a} | {b}"]),
+    xor.code: ("a b", ["{a} ^ {b}"]),
+    invert.code: ("a", ["~{a}"]),
+    bsl.code: ("a", ["{a} << 1"]),
+    bsr.code: ("a", ["{a} >> 1"]),
+    equals.code: ("a b", ["-({b} == {a})"]),
+    less.code: ("a b", ["-({a} < {b})"]),
+    greater.code: ("a b", ["-({a} > {b})"]),
+    zero_eq.code: ("a", ["-({a} == 0)"]),
+    zero_less.code: ("a", ["-({a} < 0)"]),
+}
+
+# superinstruction's function -> its pair, when both can be inlined
+SPLIT = {sw.code: pair for pair, sw in SUPER.items()
+         if all(code in INLINE for code in pair)}
+
+_IS_NAME = re.compile(r"^\{[abc]\}$")
+
+# conditional branch -> functions to inline before it pops its flag
+TESTS = {zero_branch: (), **{sw: (code,) for code, sw in BRANCH_SUPER.items()}}
+
+
+def _body(cw: ColWord):
+    """What cw runs: its optimized words if it has them (see optimize)."""
+    return cw.words if cw.optimized is None else cw.optimized
+
+
+def _inlinable(w):
+    return isinstance(w, PrimWord) and (
+        w.lit_form is not None or w.code in INLINE or w.code in SPLIT)
+
+
+def _literal(val):
+    return f"({val!r})" if isinstance(val, int) and val < 0 else repr(val)
+
+
+def _fn_name(cw: ColWord):
+    return "jit_" + re.sub(r"\W", "_", cw.name)
+
+
+def generate(cw: ColWord, start=0, end=None, fn_name=None):
+    """Return (source, namespace, ops) for what cw runs (from start to end).
+
+    Calls to colon words are left to the inner interpreter, so a task
+    can pause in them (see tasks.py): the source has a function for
+    each run of code between them, and ops is the function names and
+    colon words called, in order.
+
+    For a run of code in a word with jumps, end is the index of what
+    follows body: the function returns it, or, if it's a jump, takes
+    the jump by returning where it goes.
+    """
+
+    words = _body(cw)
+    fn_name = fn_name or _fn_name(cw)
+    funcs = []
+    lines = []
+    ns = {}
+    ops = []
+    stack = []      # locals/literals standing in for top of st.stk
+    n_temps = 0
+
+    def temp():
+        nonlocal n_temps
+        n_temps += 1
+        return f"t{n_temps - 1}"
+
+    def need(n):
+        # pull items from real stack; they go *under* what we hold
+        while len(stack) < n:
+            t = temp()
+            lines.append(f"{t} = pop()")
+            stack.insert(0, t)
+
+    def flush():
+        lines.extend(f"push({t})" for t in stack)
+        stack.clear()
+
+    def ret():
+        w = words[end] if end < len(words) else None
+        if w in TESTS:
+            for test in TESTS[w]:
+                inline(test)
+            need(1)
+            flag = stack.pop()
+            flush()
+            return f"return {end + 2} if {flag} else {end + 1 + words[end + 1]}"
+        flush()
+        if w is branch:
+            return f"return {end + 1 + words[end + 1]}"
+        if w is exit_:
+            return f"return {len(words)}"
+        return f"return {end}"
+
+    def end_func():
+        tail = [ret()] if end is not None else []
+        flush()
+        if lines:
+            name = f"{fn_name}_{len(funcs)}" if funcs or ops else fn_name
+            body = []
+            # bind st.stk's methods only if it saves looking them up
+            for method in ("push", "pop"):
+                uses = sum(ln.count(f"{method}(") for ln in lines)
+                if uses > 1:
+                    body.append(f"{method} = st.stk.{method}")
+                elif uses:
+                    lines[:] = [ln.replace(f"{method}(", f"st.stk.{method}(")
+                                for ln in lines]
+            body += lines + tail
+            funcs.append(f"def {name}(st):\n"
+                         + "".join(f"    {ln}\n" for ln in body))
+            ops.append(name)
+            lines.clear()
+
+    def inline(code):
+        inputs, outputs = INLINE[code]
+        inputs = inputs.split()
+        need(len(inputs))
+        args = dict(zip(inputs, stack[-len(inputs):]))
+        del stack[-len(inputs):]
+        for out in outputs:
+            if _IS_NAME.match(out):
+                stack.append(out.format(**args))
+            else:
+                t = temp()
+                lines.append(f"{t} = {out.format(**args)}")
+                stack.append(t)
+
+    for w in words[start:end]:
+        form = getattr(w, "lit_form", None)
+        if form:
+            # eg (1 +): the literal, then the operator
+            stack.append(_literal(form[1]))
+            inline(LIT_OPS[form[0]][0].code)
+        elif isinstance(w, PrimWord) and w.code in SPLIT:
+            for code in SPLIT[w.code]:
+                inline(code)
+        elif isinstance(w, PrimWord) and w.code in INLINE:
+            inline(w.code)
+        elif isinstance(w, PrimWord):
+            flush()
+            name = f"w{len(ns)}"
+            ns[name] = w.code
+            lines.append(f"{name}(st)")
+        elif isinstance(w, ColWord):
+            end_func()
+            ops.append(w)
+        elif type(w) in (int, str):
+            stack.append(_literal(w))
+        else:
+            name = f"k{len(ns)}"
+            ns[name] = w
+            stack.append(name)
+    end_func()
+    return "\n\n".join(funcs), ns, ops
+
+
+def _runs(body):
+    """Yield (start, end) of each run of straight-line code in body.
+
+    Runs hold no jumps or calls, and only start at a jump target, or
+    where code goes on after a jump or a call returns.
+    """
+
+    starts = set()
+    steps = []      # indexes of items that can be in a run
+    i = 0
+    while i < len(body):
+        w = body[i]
+        if isinstance(w, PrimWord) and w.threader and w.operand:
+            starts.add(i + 1 + body[i + 1])
+            starts.add(i + 2)
+            i += 2
+        elif isinstance(w, ColWord) or (isinstance(w, PrimWord) and w.threader):
+            starts.add(i + 1)
+            i += 1
+        else:
+            steps.append(i)
+            i += 1
+    start = None
+    for i in steps:
+        if start is not None and (i != end or i in starts):
+            yield start, end
+            start = None
+        if start is None:
+            start = i
+        end = i + 1
+    if start is not None:
+        yield start, end
+
+
+def _jit_jumps(cw: ColWord, body):
+    """JIT runs of straight-line code in cw, which has jumps (see above)."""
+
+    code, _ = cw.thread()
+    sources = []
+    for start, end in _runs(body):
+        run = body[start:end]
+        jumps = end < len(body) and body[end] in (*TESTS, branch, exit_)
+        if not jumps and (len(run) < 2 or not any(_inlinable(w) for w in run)):
+            continue
+        name = f"{_fn_name(cw)}_{start}"
+        src, ns, _ = generate(cw, start, end, name)
+        exec(compile(src, f"<jit {cw.name}>", "exec"), ns)
+        if name in ns:      # else the run does nothing to the stack
+            code[start] = ns[name]
+            sources.append(src)
+    if not sources:
+        cw.jit_source = ""
+        return
+    for w in body:
+        if isinstance(w, ColWord):
+            w.add_dependent(cw)
+    cw._code = code
+    cw._jumps = True
+    cw.jit_source = "\n\n".join(sources)
+
+
+def jit_word(cw: ColWord):
+    """Compile cw to Python functions and make them its threaded code."""
+
+    body = _body(cw)
+    if any(isinstance(w, PrimWord) and w.threader for w in body):
+        _jit_jumps(cw, body)
+        return
+    if not any(_inlinable(w) for w in body):
+        # only worth it if it saves stack traffic (threaded code runs a
+        # body of calls just as fast)
+        cw.jit_source = ""
+        return
+    src, ns, ops = generate(cw)
+    exec(compile(src, f"<jit {cw.name}>", "exec"), ns)
+    code = []
+    for op in ops:
+        if isinstance(op, ColWord):
+            # primitives are shared by every State and never change
+            op.add_dependent(cw)
+            code.append(_call(op))
+        else:
+            code.append(ns[op])
+    cw._code = code
+    cw._jumps = any(isinstance(op, ColWord) for op in ops)
+    cw.jit_source = src
+
+
+@new_word("jit-on")
+def jit_on(st):
+    """( -- ) JIT-compile colon words once they get hot."""
+    st.jit = JIT_THRESHOLD
+
+
+@new_word("jit-off")
+def jit_off(st):
+    """( -- ) Stop JIT, dropping any JIT-compiled code."""
+    st.jit = 0
+    cw = st.latest
+    while cw:
+        if isinstance(cw, ColWord):
+            cw.unjit()
+        cw = cw.next_
@@ -2,11 +2,13 @@
 
 \ Core
 
+: decimal  [[ ( -- )                       Read/print numbers in base 10. ]]    10 base ! ;
+: hex      [[ ( -- )                       Read/print numbers in base 16. ]]    16 base ! ;
+: binary   [[ ( -- )                       Read/print numbers in base 2.  ]]    2 base ! ;
+
 \ IO
 
-: cr       [[ ( -- )                       Print newline.                 ]]    10 emit ;
 : bl       [[ ( -- 32 )                    Push space ASCII code.         ]]    32 ;
-: space    [[ ( -- )                       Print space.                   ]]    bl emit ;
 \ : ."       [[ ( n -- )                     Print top item.                ]]    s" . ;              \ BUGGY
 
 \ Math
@@ -19,6 +21,7 @@
 : 1-       [[ ( n -- n-1 )                 Decrement top item.            ]]    1 - ;
 : 2+       [[ ( n -- n+2 )                 +2 to top item.                ]]    1+ 1+ ;
 : 2-       [[ ( n -- n-2 )                 -2 to top item.                ]]    1- 1- ;
+: abs      [[ ( n -- |n| )                 Absolute value.                ]]    dup 0< if negate then ;
 
 \ Logic
 
@@ -26,6 +29,8 @@
 : true     [[ ( -- -1 )                    Push TRUE.                     ]]    -1 ;
 : nand     [[ ( n1 n2 -- n3 )              n1 NAND n2 -> n3               ]]    and invert ;
 : nor      [[ ( n1 n2 -- n3 )              n1 NOR n2 -> n3                ]]    or invert ;
+: <>       [[ ( n1 n2 -- flag )            True if n1 <> n2.              ]]    = invert ;
+: 0>       [[ ( n -- flag )                True if n is positive.         ]]    0 > ;
 
 \ Stack
 
@@ -35,9 +40,11 @@
 : -rot     [[ ( n1 n2 n3 -- n3 n1 n2 )     Rotate right.                  ]]    rot rot ;
 : 2dup     [[ ( n1 n2 -- n1 n1 n2 n2 )     Duplicate top 2 items.         ]]    swap dup rot dup ;
 : 2drop    [[ ( n1 n2 -- )                 Drop two top items.            ]]    drop drop ;
+: ?dup     [[ ( n -- n n | 0 )             Duplicate top item if not 0.   ]]    dup if dup then ;
 
 \ Misc
 
 : cs       [[ ( -- )                       Alias for `clearstack`         ]]    clearstack ;
 : help     [[ ( -- )                       Parse word & show its help.    ]]    help@ . cr ;
 : ?        [[ ( addr -- )                  Print value of variable.       ]]    @ . ;
+: +!       [[ ( n addr -- )                Add n to value of variable.    ]]    dup @ rot + swap ! ;
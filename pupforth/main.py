@@ -1,48 +1,118 @@
-import traceback
-
 from .exceptions import ForthError
-from .stack import Stack
-from .words import new_word
-from .primitives import quit_, clear_stack, word, execute, number
+from .stack import Stack, CellStack
+from .memory import DataSpace, BASE
+from .output import Output
+from .scanner import Source, parse_name, interpret_source
+from .utils import to_number
+from .words import Dictionary, PRIMITIVES
+from .primitives import quit_, clear_stack, execute
+from .trace import COMPILE
+from . import jit  # noqa: F401 -- defines jit-on/jit-off
+from . import image  # noqa: F401 -- defines save-image/load-image
+from . import profiler  # noqa: F401 -- defines profile-on/-off/.profile
+from . import optimize  # noqa: F401 -- defines optimize
+from . import vector  # noqa: F401 -- defines v+ vsum move fill ...
+from . import tasks  # noqa: F401 -- defines task: activate pause ...
+from . import include  # noqa: F401 -- defines include included require ...
+
+_NOT_FOUND_MAX = 4096   # forget cached non-words past this many
 
 
 class State:
     """State machine for the overall Forth environment."""
 
-    stk: Stack = Stack()
-    ret_stack: Stack = Stack()
+    stk: Stack | CellStack
+    ret_stack: Stack | CellStack
     inp_buffer: str = ""
     inp_pos: int = 0
+    in_shared: bool = False          # >in taken: inp_pos is kept in data space
+    source = None                    # Source being interpreted, or None
     compiling: str = False
     force_immediate: bool = False    # 1 2 [ ." hey" ] 3 4
+    jit: int = 0                     # calls before JIT-compiling; 0=off
+    profiler = None                  # Profiler, when profiling
+    last_profile = None              # Profiler, once profiling is off
+    tracer = None                    # Tracer, when tracing
+    last_trace = None                # Tracer, once tracing is off
+    task = None                      # Task running, or None: main task
+    effects: int = 0                 # words run that read/wrote files
     # colon_start: int = 0
-    memory: list = []
+    memory: DataSpace
+    out: Output
+
+    def __init__(self, stack_class=Stack, out=None):
+        """Make state; stack_class can be Stack (list) or CellStack.
+
+        out is the Output to write to (default: buffered sys.stdout).
+        """
+        self.out = out or Output()
+        self.stk = stack_class()
+        self.ret_stack = stack_class()
+        self.memory = DataSpace()
+        self.memory.comma(10)   # BASE
+        self.memory.comma(0)    # >IN
+        self.leaves = []    # while compiling do loops: leave offsets
+        self.dictionary = Dictionary(PRIMITIVES)
+        self.tasks = []
+        self.sources = []   # input sources interrupted by includes
+        self.included = []  # (device, inode) of each file included
+
+    def spawn(self, out=None):
+        """New State with this one's words and a copy of its data space.
+
+        The dictionary is shared copy-on-write, as with PRIMITIVES, so
+        either State can define, hide and forget words without the other
+        seeing it. Colon words themselves are shared, so don't profile or
+        trace both.
+        """
+
+        st = State(type(self.stk), out)
+        st.dictionary = Dictionary(self.dictionary)
+        st.memory = self.memory.copy()
+        st.jit = self.jit
+        st.included = self.included.copy()
+        return st
 
     @property
     def latest(self):
         """Head of stack of added-words."""
-        # noinspection PyUnresolvedReferences
-        return new_word.latest
+        return self.dictionary.latest
 
     def interpret(self):
-        """Main interp: parse word, find it (or find ok number), exec it."""
+        """Main interp: parse word, find it (or read number), exec it.
+
+        Tokens that aren't words go straight to number conversion,
+        without going through the stack and `number`; tokens found not
+        to be words are remembered so they skip lookup next time.
+        """
 
-        try:
-            word(self)
-        except ForthError:
+        tok = parse_name(self)
+        if not tok:
+            return
+        not_found = self.dictionary.not_found
+        found = None if tok in not_found else self.dictionary.lookup(tok)
+        if found is None:
+            n = to_number(tok, self.memory.fetch(BASE))
+            if n is None:
+                raise ForthError(f"Not number: {tok}")
+            if len(not_found) >= _NOT_FOUND_MAX:
+                not_found.clear()
+            not_found.add(tok)
+            if self.compiling:
+                self.latest.append(n)
+            else:
+                self.stk.push(n)
             return
-        fail_w = self.find()
-        if fail_w:
-            # failed to find; try it as a number, emit token & number word
-            self.stk.push(fail_w)
-            self.stk.push(number)
+        self.stk.push(found)
 
         op = self.stk.peek()
         if self.compiling and not self.force_immediate:
             if op.compilation:
                 execute(self)
             else:
-                new_word.latest.words.append(self.stk.pop())
+                if self.tracer:
+                    self.tracer.record(COMPILE, op, self)
+                self.latest.append(self.stk.pop())
         else:
             if not op.immediate:
                 raise ForthError("Cannot use in immediate mode")
@@ -58,25 +128,53 @@ class State:
         """
 
         w = self.stk.pop()
-        cur = self.latest
-        while cur:
-            if w == cur.name and (find_hidden or not cur.hidden):
-                self.stk.push(cur)
-                return
-            cur = cur.next_
+        found = self.dictionary.lookup(w, find_hidden)
+        if found:
+            self.stk.push(found)
+            return
         # on failure, return the searched-for word; this won't be
         # accessible to forth code, but will to the interp loop
         return w
 
 
-def process(st, inp):
+def _recover(st, show_traceback):
+    """Report error and reset interpreter, as QUIT would."""
+
+    st.out.flush()
+    if show_traceback:
+        import traceback
+        traceback.print_exc()
+    clear_stack(st)
+    st.compiling = None
+    st.leaves.clear()
+
+
+def process(st, inp, show_traceback=True):
     """Process line of Forth."""
     st.inp_buffer = inp + " "
     st.inp_pos = 0
+    st.in_shared = False
     try:
         quit_(st)
     except ForthError as e:
-        traceback.print_exc()
-        clear_stack(st)
-        st.compiling = None
+        _recover(st, show_traceback)
+        raise e
+    if st.out.tty:
+        st.out.flush()
+
+
+def process_source(st, text, path=None, show_traceback=True):
+    """Process whole text of file (or string), refilling line by line.
+
+    Unlike feeding its lines to process(), definitions and comments
+    can run across lines, and `refill` reads the next one.
+    """
+
+    st.ret_stack.clear()
+    try:
+        interpret_source(st, Source(text, path))
+    except ForthError as e:
+        _recover(st, show_traceback)
         raise e
+    if st.out.tty:
+        st.out.flush()
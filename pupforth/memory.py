@@ -0,0 +1,131 @@
+"""Data space: a linear, byte-addressed memory with HERE.
+
+Cells are 8 bytes, little-endian signed. Aligned cell access goes
+through a 'q' memoryview cast of the buffer, everything else through
+struct, so nothing is copied per access.
+
+Like the stacks, data space can't hold Python objects natively; storing
+anything that isn't a cell-sized int (a string, a word) keeps the object
+in `boxed`, keyed by address, and zeroes the cell.
+"""
+
+import struct
+
+from .exceptions import ForthError
+
+CELL = 8
+CELL_MIN = -2 ** 63
+CELL_MAX = 2 ** 63 - 1
+BASE = 0        # address of the BASE variable, first cell of data space
+IN = 8          # address of >IN, the second
+
+_CELL = struct.Struct("<q")
+
+
+class DataSpace:
+    """Growable byte-addressed memory."""
+
+    def __init__(self, size=4096):
+        self._use(bytearray(size))
+        self.boxed = {}
+        self.here = 0
+
+    @classmethod
+    def from_buffer(cls, buf, here, boxed):
+        """Make data space over existing writable buffer (eg an mmap)."""
+
+        ds = cls.__new__(cls)
+        ds._use(buf)
+        ds.boxed = boxed
+        ds.here = here
+        return ds
+
+    def copy(self):
+        """Independent copy of data space (and its boxed values)."""
+
+        return DataSpace.from_buffer(bytearray(self.buf), self.here, dict(self.boxed))
+
+    def _use(self, buf):
+        self.buf = buf
+        self.mv = memoryview(buf)
+        self.cells = self.mv.cast("q")
+
+    def __len__(self):
+        return len(self.buf)
+
+    def _grow(self, need):
+        """Grow (at least doubling, so amortized) to hold need bytes."""
+
+        size = max(need, 2 * len(self.buf))
+        size += -size % CELL
+        buf = bytearray(size)
+        buf[:len(self.buf)] = self.buf
+        self.cells.release()
+        self.mv.release()
+        self._use(buf)
+
+    def allot(self, n):
+        """Reserve n bytes (release if negative); return old here."""
+
+        addr = self.here
+        if addr + n < 0:
+            raise ForthError("Cannot allot before start of memory")
+        if addr + n > len(self.buf):
+            self._grow(addr + n)
+        self.here = addr + n
+        return addr
+
+    def align(self):
+        self.allot(-self.here % CELL)
+
+    def check(self, addr, width):
+        if not (type(addr) is int and 0 <= addr <= len(self.buf) - width):
+            raise ForthError(f"Invalid address: {addr}")
+
+    def fetch(self, addr):
+        self.check(addr, CELL)
+        if self.boxed and addr in self.boxed:
+            return self.boxed[addr]
+        if addr & 7:
+            return _CELL.unpack_from(self.buf, addr)[0]
+        return self.cells[addr >> 3]
+
+    def store(self, addr, v):
+        self.check(addr, CELL)
+        self.unbox(addr, CELL)
+        if not (type(v) is int and CELL_MIN <= v <= CELL_MAX):
+            self.boxed[addr] = v
+            v = 0
+        if addr & 7:
+            _CELL.pack_into(self.buf, addr, v)
+        else:
+            self.cells[addr >> 3] = v
+
+    def cfetch(self, addr):
+        self.check(addr, 1)
+        return self.buf[addr]
+
+    def cstore(self, addr, c):
+        self.check(addr, 1)
+        self.unbox(addr, 1)
+        self.buf[addr] = c & 0xFF
+
+    def unbox(self, addr, n):
+        """Drop boxed values in cells overlapping the n bytes at addr."""
+
+        boxed = self.boxed
+        if not boxed:
+            return
+        if len(boxed) > n + CELL:
+            # cheaper to look up each address a cell could start at
+            for a in range(addr - CELL + 1, addr + n):
+                boxed.pop(a, None)
+        else:
+            for a in [a for a in boxed if addr - CELL < a < addr + n]:
+                del boxed[a]
+
+    def comma(self, v):
+        self.store(self.allot(CELL), v)
+
+    def ccomma(self, c):
+        self.cstore(self.allot(1), c)
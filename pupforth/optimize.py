@@ -0,0 +1,374 @@
+"""Peephole optimizer for colon words, run by `;`.
+
+The words of a definition are kept as typed (that's what `see` shows
+first, and what images save); the optimizer makes `optimized`, which
+is what gets threaded.
+
+First, calls are inlined: constants become their value, variables and
+`create`d words their address, and short colon words without control
+flow (or any marked `inline`, but none marked `noinline`) their body.
+The caller is registered as a dependent of each word it inlined, so if
+that is redefined, hidden or forgotten, the caller goes back to calling
+it (see words.invalidate).
+
+Then, working left to right, it rewrites the end of what it has so far:
+
+- literal arithmetic is folded (`2 3 +` -> `5`, `8 negate` -> `-8`)
+- no-ops are dropped (`swap swap`, `dup drop`, `0 +`, `5 drop`)
+- a literal and an operator become one op (`1 +` -> `(1 +)`)
+- common pairs of primitives become one superinstruction
+
+The superinstructions are the pairs of primitives run most often inside
+colon words over the benchmark workloads, as counted by
+`python -m benchmarks.pairs`. Nothing is merged across a place a branch
+jumps to, and branch offsets are remapped to the new body.
+"""
+
+from bisect import bisect_left
+
+from .exceptions import ForthError
+from .primitives import (
+    word, find, dup, drop, swap, rot, add, mul, negate, and_, or_, xor,
+    invert, bsl, bsr, equals, less, greater, zero_eq, zero_less,
+    c_bang, i_, zero_branch, number)
+from .words import (
+    new_word, lit_op, Word, PrimWord, ColWord, PRIMITIVES, LIT_OPS)
+
+INLINE_MAX = 8      # longest colon body inlined without `inline`
+_INLINE_DEPTH = 4   # how deep to inline words inlined into words
+
+# literal literal op -> literal; first arg is the deeper item
+FOLD2 = {
+    add.code: lambda a, b: a + b,
+    mul.code: lambda a, b: a * b,
+    and_.code: lambda a, b: a & b,
+    or_.code: lambda a, b: a | b,
+    xor.code: lambda a, b: a ^ b,
+    equals.code: lambda a, b: -(a == b),
+    less.code: lambda a, b: -(a < b),
+    greater.code: lambda a, b: -(a > b),
+}
+
+# literal op -> literal
+FOLD1 = {
+    negate.code: lambda a: -a,
+    invert.code: lambda a: ~a,
+    bsl.code: lambda a: a << 1,
+    bsr.code: lambda a: a >> 1,
+    zero_eq.code: lambda a: -(a == 0),
+    zero_less.code: lambda a: -(a < 0),
+}
+
+# pairs of primitives that do nothing
+NO_OPS = [(swap, swap), (dup, drop), (invert, invert), (negate, negate)]
+
+# literal operands that make an op do nothing
+IDENTITIES = {add.code: 0, mul.code: 1, or_.code: 0, xor.code: 0, and_.code: -1}
+
+
+def _lit_add(n):
+    def lit_add(st):
+        st.stk.push(st.stk.pop() + n)
+    return lit_add
+
+
+def _lit_less(n):
+    def lit_less(st):
+        st.stk.push(-(st.stk.pop() < n))
+    return lit_less
+
+
+# literal op -> one op, made for the literal (see words.lit_op)
+LIT_OPS.extend([(add, _lit_add), (less, _lit_less)])
+LIT_FORMS = {op.code: k for k, (op, _) in enumerate(LIT_OPS)}
+
+
+def _super(name, doc):
+    """Make a superinstruction: a primitive not in the dictionary.
+
+    Its execution token is from PRIMITIVES, as for primitives, so it
+    means the same in every dictionary.
+    """
+
+    def decorator(func):
+        w = PrimWord(None, name, doc, func, False, False)
+        PRIMITIVES.register(w)
+        return w
+
+    return decorator
+
+
+@_super("negate +", "( n1 n2 -- diff ) Subtract n1-n2.")
+def _sub(st):
+    n2 = st.stk.pop()
+    st.stk.push(st.stk.pop() - n2)
+
+
+@_super("swap dup", "( n1 n2 -- n2 n1 n1 )")
+def _swap_dup(st):
+    n2 = st.stk.pop()
+    n1 = st.stk.pop()
+    st.stk.push(n2)
+    st.stk.push(n1)
+    st.stk.push(n1)
+
+
+@_super("rot swap", "( n1 n2 n3 -- n2 n1 n3 )")
+def _rot_swap(st):
+    n3 = st.stk.pop()
+    n2 = st.stk.pop()
+    n1 = st.stk.pop()
+    st.stk.push(n2)
+    st.stk.push(n1)
+    st.stk.push(n3)
+
+
+@_super("i +", "( n -- n+i )")
+def _i_add(st):
+    st.stk.push(st.stk.pop() + st.ret_stack.peek())
+
+
+@_super("+ c!", "( c n addr -- )")
+def _add_c_bang(st):
+    addr = st.stk.pop() + st.stk.pop()
+    st.memory.cstore(addr, st.stk.pop())
+
+
+SUPER = {
+    (negate.code, add.code): _sub,
+    (swap.code, dup.code): _swap_dup,
+    (rot.code, swap.code): _rot_swap,
+    (i_.code, add.code): _i_add,
+    (add.code, c_bang.code): _add_c_bang,
+}
+
+
+def _thread_dup_zero_branch(words, i):
+    target = i + 1 + words[i + 1]
+    skip = i + 2
+
+    def dup_zbranch(st):
+        return skip if st.stk.peek() else target
+
+    return dup_zbranch
+
+
+def _thread_less_zero_branch(words, i):
+    target = i + 1 + words[i + 1]
+    skip = i + 2
+
+    def less_zbranch(st):
+        n2 = st.stk.pop()
+        return skip if st.stk.pop() < n2 else target
+
+    return less_zbranch
+
+
+_dup_zbranch = PrimWord(None, "dup 0branch", "( n -- n )", zero_branch.code,
+                        False, False)
+_dup_zbranch.threader = _thread_dup_zero_branch
+_less_zbranch = PrimWord(None, "< 0branch", "( n1 n2 -- )", zero_branch.code,
+                         False, False)
+_less_zbranch.threader = _thread_less_zero_branch
+PRIMITIVES.register(_dup_zbranch)
+PRIMITIVES.register(_less_zbranch)
+
+# op 0branch -> one branch
+BRANCH_SUPER = {
+    dup.code: _dup_zbranch,
+    less.code: _less_zbranch,
+}
+
+
+def _is_lit(tok):
+    return not isinstance(tok[0], Word)
+
+
+def _is_int(tok):
+    return type(tok[0]) is int
+
+
+def _code(tok):
+    w = tok[0]
+    return w.code if isinstance(w, PrimWord) and tok[2] is None else None
+
+
+def _reduce(out, targets):
+    """Rewrite the end of out once; return whether anything changed.
+
+    Tokens are [item, index in original words, branch target or None].
+    """
+
+    if not out or _is_lit(out[-1]):
+        return False    # every rewrite ends with an op
+
+    def joinable(n):
+        # nothing may jump into the middle of what we merge
+        return len(out) >= n and all(t[1] not in targets for t in out[1 - n:])
+
+    if joinable(3) and _is_int(out[-3]) and _is_int(out[-2]):
+        a, b, op = out[-3:]
+        if _code(op) in FOLD2:
+            out[-3:] = [[FOLD2[_code(op)](a[0], b[0]), a[1], None]]
+            return True
+        if op[0] is swap:
+            out[-3:] = [[b[0], a[1], None], [a[0], b[1], None]]
+            return True
+    if joinable(3) and _is_int(out[-2]) and _code(out[-1]) is add.code:
+        # (n1 +) n2 + -> n1+n2 +, which then reduces further
+        form = getattr(out[-3][0], "lit_form", None)
+        if form and LIT_OPS[form[0]][0] is add:
+            a, b, op = out[-3:]
+            out[-3:] = [[form[1] + b[0], a[1], None], op]
+            return True
+
+    if not joinable(2):
+        return False
+    a, b = out[-2:]
+    code = _code(b)
+    if _is_lit(a):
+        if code in FOLD1 and _is_int(a):
+            out[-2:] = [[FOLD1[code](a[0]), a[1], None]]
+        elif b[0] is dup:
+            out[-2:] = [a, [a[0], b[1], None]]
+        elif b[0] is drop or (
+                code in IDENTITIES and _is_int(a) and a[0] == IDENTITIES[code]):
+            del out[-2:]
+        elif code in LIT_FORMS and _is_int(a):
+            out[-2:] = [[lit_op(LIT_FORMS[code], a[0]), a[1], None]]
+        else:
+            return False
+        return True
+
+    if any(a[0] is x and b[0] is y for x, y in NO_OPS):
+        del out[-2:]
+        return True
+    if (_code(a), code) in SUPER:
+        out[-2:] = [[SUPER[_code(a), code], a[1], None]]
+        return True
+    if b[0] is zero_branch and _code(a) in BRANCH_SUPER:
+        out[-2:] = [[BRANCH_SUPER[_code(a)], a[1], b[2]]]
+        return True
+    return False
+
+
+def _has_jumps(words):
+    return any(isinstance(w, PrimWord) and w.threader for w in words)
+
+
+def inline_body(w):
+    """Words to put in place of a call to w, or None to call it."""
+
+    if not isinstance(w, ColWord) or w.inline is False:
+        return None
+    body = w.words
+    if len(body) == 2 and body[1] is number and type(body[0]) is int:
+        return body[:1]     # a constant
+    if _has_jumps(body) or any(x is w for x in body):
+        return None
+    if w.inline is None and len(body) > INLINE_MAX:
+        return None
+    return body
+
+
+def _expand(body, inlined, depth=0):
+    """Yield body with calls inlined; note words inlined."""
+
+    for w in body:
+        sub = inline_body(w) if depth < _INLINE_DEPTH else None
+        if sub is None:
+            yield w
+        else:
+            inlined.append(w)
+            yield from _expand(sub, inlined, depth + 1)
+
+
+def optimize(cw: ColWord):
+    """Set cw.optimized to inlined and peephole-optimized words.
+
+    If nothing could be improved, cw.optimized is None.
+    """
+
+    words = cw.words
+    toks = []
+    targets = set()
+    inlined = []
+    i = 0
+    while i < len(words):
+        w = words[i]
+        if isinstance(w, PrimWord) and w.threader and w.operand:
+            target = i + 1 + words[i + 1]
+            targets.add(target)
+            toks.append([w, i, target])
+            i += 2
+        elif isinstance(w, ColWord) and inline_body(w) is not None:
+            # all but the first inlined item get an index nothing jumps to
+            for n, x in enumerate(_expand([w], inlined)):
+                toks.append([x, i + 0.5 if n else i, None])
+            i += 1
+        else:
+            toks.append([w, i, None])
+            i += 1
+
+    cw.inlined = inlined or ()
+    for w in inlined:
+        w.add_dependent(cw)
+
+    out = []
+    changed = bool(inlined)
+    for tok in toks:
+        out.append(tok)
+        while _reduce(out, targets):
+            changed = True
+
+    if not changed:
+        cw.optimized = None
+    else:
+        body = []
+        starts = []     # index in body of each token
+        for item, _, target in out:
+            starts.append(len(body))
+            body.append(item)
+            if target is not None:
+                body.append(target)     # fixed up below
+        origins = [tok[1] for tok in out]
+        for tok, at in zip(out, starts):
+            if tok[2] is not None:
+                k = bisect_left(origins, tok[2])
+                dest = starts[k] if k < len(starts) else len(body)
+                body[at + 1] = dest - (at + 1)
+        cw.optimized = body
+    cw._code = None
+
+
+@new_word("optimize")
+def optimize_(st):
+    """( -- ) Peephole-optimize next word (done by `;` anyway)."""
+
+    word(st)
+    find(st)
+    cw = st.stk.pop()
+    if not isinstance(cw, ColWord):
+        raise ForthError(f"Not a colon word: {cw.name}")
+    optimize(cw)
+
+
+def _mark_inline(st, flag):
+    cw = st.latest
+    if not isinstance(cw, ColWord):
+        raise ForthError(f"Not a colon word: {cw.name}")
+    if flag and _has_jumps(cw.words):
+        raise ForthError(f"Cannot inline word with control flow: {cw.name}")
+    cw.inline = flag
+
+
+@new_word("inline")
+def inline(st):
+    """( -- ) Always inline latest word: `: sq dup * ; inline`."""
+    _mark_inline(st, True)
+
+
+@new_word("noinline")
+def noinline(st):
+    """( -- ) Never inline latest word into callers."""
+    _mark_inline(st, False)
@@ -0,0 +1,56 @@
+"""Buffered output, owned by each State as st.out.
+
+Output words write to st.out, which gathers text and hands it to its
+sink in large pieces, rather than calling print() per item. The sink is
+any file-like object with write(str) and flush(): an open file, an
+io.StringIO to capture output when embedding, or a socket's makefile().
+By default it's whatever sys.stdout is at the time, so redirecting
+sys.stdout redirects it too.
+
+A sink that is a TTY is written to at every newline, and at the end of
+each line of input (see main.process), so prompts and interactive
+output show up at once; anything else, only when BUFFER_SIZE characters
+have gathered. Either way, output is flushed on errors, at `bye`, by
+`flush`, and by the programs running Forth as they finish.
+"""
+
+import sys
+
+BUFFER_SIZE = 8192      # characters gathered before writing to the sink
+
+
+class Output:
+    """Write buffer in front of a sink (None: sys.stdout)."""
+
+    def __init__(self, sink=None, size=BUFFER_SIZE):
+        self.sink = sink
+        self.size = size
+        self.buf = []
+        self.pending = 0        # characters in buf
+        self.flushed = 0        # characters written to sink
+        isatty = getattr(sink or sys.stdout, "isatty", None)
+        self.tty = bool(isatty and isatty())
+
+    @property
+    def written(self):
+        """Characters ever written."""
+        return self.flushed + self.pending
+
+    def write(self, s):
+        self.buf.append(s)
+        self.pending += len(s)
+        if self.pending >= self.size or (self.tty and "\n" in s):
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        """Write what has gathered to the sink, and flush that."""
+
+        if self.buf:
+            sink = self.sink or sys.stdout
+            text = "".join(self.buf)
+            self.buf.clear()
+            self.flushed += self.pending
+            self.pending = 0
+            sink.write(text)
+            sink.flush()
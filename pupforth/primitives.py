@@ -3,29 +3,61 @@
 Many more words are implemented in Forth; see lib.f.
 """
 
-import dis
-import ctypes
-
 from .exceptions import ForthError, ParseError, ForthBye
-from .utils import RESET, GREEN
-from .words import new_word, new_col, PrimWord, ColWord
+from .memory import CELL, BASE, IN
+from .scanner import parse_name, parse, parse_lines, refill, more_input
+from .trace import EXEC
+from .utils import RESET, GREEN, parse_docstring, to_base_n, to_number
+from .words import (
+    new_word, new_col, PrimWord, ColWord)
 
 
 @new_word()
-def word(self):
+def word(st):
     """( -- tok ) Get next token to stack."""
-    nw = ""
 
-    try:
-        while self.inp_buffer[self.inp_pos].isspace():
-            self.inp_pos += 1
-        while not self.inp_buffer[self.inp_pos].isspace():
-            nw += self.inp_buffer[self.inp_pos]
-            self.inp_pos += 1
-        self.inp_pos += 1
-        self.stk.push(nw)
-    except IndexError:
+    nw = parse_name(st)
+    if not nw:
         raise ParseError("Couldn't find next token.")
+    st.stk.push(nw)
+
+
+@new_word("parse-name")
+def parse_name_(st):
+    """( -- tok ) Get next token to stack; empty string at end of input."""
+    st.stk.push(parse_name(st))
+
+
+@new_word("parse")
+def parse_(st):
+    """( ch -- str ) Get input up to delimiter char ch."""
+
+    ch = st.stk.pop()
+    if isinstance(ch, int):
+        ch = chr(ch)
+    st.stk.push(parse(st, ch))
+
+
+@new_word()
+def source(st):
+    """( -- str ) Put input buffer (the current line) on top."""
+    st.stk.push(st.inp_buffer)
+
+
+@new_word(">in")
+def to_in(st):
+    """( -- addr ) Address of offset in input buffer of next char to parse."""
+
+    if not st.in_shared:
+        st.memory.store(IN, st.inp_pos)
+        st.in_shared = True
+    st.stk.push(IN)
+
+
+@new_word("refill")
+def refill_(st):
+    """( -- flag ) Read next line of file being included; false if none."""
+    st.stk.push(-1 if refill(st) else 0)
 
 @new_word()
 def drop(st):
@@ -54,32 +86,40 @@ def dup(st):
 @new_word("tell")
 @new_word(".")
 def dot(st):
-    """( n -- ) Pop and output top item."""
-    print(st.stk.pop(), end=' ')
+    """( n -- ) Pop and output top item (numbers in BASE)."""
+
+    n = st.stk.pop()
+    if type(n) is int:
+        n = to_base_n(n, st.memory.fetch(BASE))
+    st.out.write(f"{n} ")
 
 
 @new_word("number", compilation=True)
 def number(st):
-    """( w -- n ) Parse word as number."""
+    """( w -- n ) Parse word as number, in BASE."""
+
     n = st.stk.pop()
-    try:
-        n = int(n)
-    except ValueError:
-        raise ForthError(f"Not number: {n}")
+    if type(n) is not int:
+        tok = n
+        n = to_number(tok, st.memory.fetch(BASE))
+        if n is None:
+            raise ForthError(f"Not number: {tok}")
 
     if st.compiling:
-        new_word.latest.words.append(n)
+        st.latest.append(n)
     else:
         st.stk.push(n)
 
 
 @new_word("num-get", compilation=True)
-def num_get(st, ):
+def num_get(st):
+    """( -- n ) Read next word as a decimal number."""
+
     word(st)
-    print("word-get", st.stk.peek())
     n = int(st.stk.pop())
     st.stk.push(n)
 
+
 @new_word("+")
 def add(st):
     """( n1 n2 -- sum ) Add n1 + n2."""
@@ -174,7 +214,7 @@ def swap(st):
 @new_word("quit")
 def quit_(st):
     st.ret_stack.clear()
-    while st.inp_pos < len(st.inp_buffer):
+    while more_input(st):
         st.interpret()
 
 
@@ -183,10 +223,10 @@ def words_(st):
     """( -- ) Show all defined words."""
     cw = st.latest
     while cw:
-        if not cw.hidden:
-            print(cw.name, end=' ')
+        if not st.dictionary.is_hidden(cw):
+            st.out.write(f"{cw.name} ")
         cw = cw.next_
-    print()
+    st.out.write("\n")
 
 
 @new_word("words+")
@@ -194,8 +234,8 @@ def words_plus(st):
     """( -- ) Show all defined words and help."""
     cw = st.latest
     while cw:
-        if not cw.hidden:
-            print(f"{cw.name:20}{cw.doc}")
+        if not st.dictionary.is_hidden(cw):
+            st.out.write(f"{cw.name:20}{parse_docstring(cw.doc)}\n")
         cw = cw.next_
 
 
@@ -203,19 +243,16 @@ def words_plus(st):
 @new_word("bye")
 def bye(st):
     """( -- ) Quit program."""
+    st.out.flush()
     raise ForthBye()
 
 
 @new_word('s"', compilation=True)
 def literal_str_st(st):
-    cs = ""
-    while st.inp_buffer[st.inp_pos] != '"':
-        cs += st.inp_buffer[st.inp_pos]
-        st.inp_pos += 1
-    st.inp_pos += 1
+    cs = parse(st, '"')
 
     if st.compiling:
-        new_word.latest.words.append(cs)
+        st.latest.append(cs)
     else:
         st.stk.push(cs)
 
@@ -243,32 +280,23 @@ def literal_str(st):
 @new_word(".s")
 def stack_dump(st):
     """( -- ) Show dump of stack."""
-    print(
+    st.out.write(
         f"{GREEN}<{len(st.stk)}>{RESET} "
         f"{' '.join(map(repr, st.stk))}"
-        f"{GREEN} <- Top{RESET}"
+        f"{GREEN} <- Top{RESET}\n"
     )
 
 
 @new_word("\\")
 def line_comment(st):
     """( -- ) Ignore until end of line."""
-    while st.inp_pos < len(st.inp_buffer) and st.inp_buffer[st.inp_pos] != '\\':
-        st.inp_pos += 1
+    parse(st, "\n")
 
 
 @new_word("(", compilation=True)
 def paren_comment(st):
-    """( -- ) Ignore as comment until ')'."""
-
-    # FIXME: works when shouldn't for ( foo bar), ( foo bar)., etc
-    # change imp to getting words and looking for ) token ?
-
-    while True:
-        word(st)
-        wd = st.stk.pop()
-        if wd == ")":
-            break
+    """( -- ) Ignore as comment until ')', which may be on a later line."""
+    parse_lines(st, ")")
 
 
 @new_word("clearstack")
@@ -295,7 +323,7 @@ def help_at(st):
     """( w -- str ) Put help for w on top."""
     word(st)
     find(st)
-    st.stk.push(st.stk.pop().doc)
+    st.stk.push(parse_docstring(st.stk.pop().doc))
 
 
 @new_word("constant")
@@ -304,7 +332,7 @@ def constant(st):
 
     word(st)
     name = st.stk.pop()
-    new_col(name, [st.stk.pop(), number])
+    new_col(st.dictionary, name, [st.stk.pop(), number])
 
 
 @new_word("char")
@@ -320,8 +348,37 @@ def char_(st):
 def emit(st):
     """( n -- ) Print ASCII char from code."""
 
-    ch = st.stk.pop()
-    print(chr(ch), end='')
+    st.out.write(chr(st.stk.pop()))
+
+
+@new_word("type")
+def type_(st):
+    """( s -- ) Print string."""
+    st.out.write(st.stk.pop())
+
+
+@new_word("cr")
+def cr(st):
+    """( -- ) Print newline."""
+    st.out.write("\n")
+
+
+@new_word("space")
+def space(st):
+    """( -- ) Print space."""
+    st.out.write(" ")
+
+
+@new_word("spaces")
+def spaces(st):
+    """( n -- ) Print n spaces."""
+    st.out.write(" " * st.stk.pop())
+
+
+@new_word("flush")
+def flush(st):
+    """( -- ) Write out any buffered output now."""
+    st.out.flush()
 
 
 @new_word("hide")
@@ -331,7 +388,7 @@ def hide(st):
     word(st)
     find(st)
     wd = st.stk.pop()
-    wd.hidden = True
+    st.dictionary.hide(wd)
 
 
 @new_word("hidden?")
@@ -341,7 +398,7 @@ def hidden_q(st):
     word(st)
     find(st, find_hidden=True)
     wd = st.stk.pop()
-    st.stk.push(-1 if wd.hidden else 0)
+    st.stk.push(-1 if st.dictionary.is_hidden(wd) else 0)
 
 
 @new_word("unhide")
@@ -351,7 +408,7 @@ def unhide(st):
     word(st)
     find(st, find_hidden=True)
     w = st.stk.pop()
-    w.hidden = False
+    st.dictionary.unhide(w)
 
 
 @new_word()
@@ -360,7 +417,7 @@ def forget(st):
     word(st)
     find(st)
     wd = st.stk.pop()
-    new_word.latest = wd.next_
+    st.dictionary.unlink_through(wd)
 
 
 @new_word()
@@ -371,15 +428,22 @@ def see(st):
     find(st)
     wd = st.stk.pop()
     if isinstance(wd, PrimWord):
-        print("Primitive word: Python bytecode follows")
-        dis.dis(wd.code)
+        import dis
+        print("Primitive word: Python bytecode follows", file=st.out)
+        dis.dis(wd.code, file=st.out)
     elif isinstance(wd, ColWord):
-        print(wd.words)
+        print(wd.words, file=st.out)
+        if wd.optimized is not None:
+            print("Optimized:", file=st.out)
+            print(wd.optimized, file=st.out)
+        if wd.jit_source:
+            print("JIT-compiled: Python source follows", file=st.out)
+            print(wd.jit_source, end="", file=st.out)
     else:
         raise ForthError("Unable to disassemble word.")
-    print(f"{'(hidden) ' if wd.hidden else ''}", end="")
-    print(f"{'(compilation) ' if wd.compilation else ''}", end="")
-    print(f"{'(immediate) ' if wd.immediate else ''}")
+    print(f"{'(hidden) ' if st.dictionary.is_hidden(wd) else ''}", end="", file=st.out)
+    print(f"{'(compilation) ' if wd.compilation else ''}", end="", file=st.out)
+    print(f"{'(immediate) ' if wd.immediate else ''}", file=st.out)
 
 
 @new_word()
@@ -393,18 +457,26 @@ def find(st, find_hidden=False):
 
 @new_word()
 def execute(st):
-    """( w -- ) Execute word."""
+    """( w -- ) Execute word (or execution token, from `'`)."""
 
-    print(f"ex {st.stk.peek()}, {st.inp_buffer}, {st.inp_pos}")
-    st.stk.pop()(st)
+    w = st.stk.pop()
+    if type(w) is int:
+        w = st.dictionary.word_at(w)
+    if st.tracer:
+        st.tracer.record(EXEC, w, st)
+    if st.profiler:
+        st.profiler.call(w, w, st)
+    else:
+        w(st)
 
 @new_word("create")
 def create(st):
-    """( -- ) Create new word entry."""
+    """( -- ) Create word that pushes address of here."""
 
     word(st)
     name = st.stk.pop()
-    new_col(name, [], "")
+    st.memory.align()
+    new_col(st.dictionary, name, [st.memory.here], "")
 
 
 @new_word("compiling@")
@@ -422,13 +494,21 @@ def compiling_poke(st):
 def comma(st):
     """( v -- ) Append v to here."""
 
-    new_word.latest.words.append(st.stk.pop())
+    st.memory.comma(st.stk.pop())
+
+
+@new_word("c,")
+def c_comma(st):
+    """( c -- ) Append byte c to here."""
+
+    st.memory.ccomma(st.stk.pop())
 
 @new_word(":")
 def colon(st):
     """( -- ) Define new word."""
 
-    create(st)
+    word(st)
+    new_col(st.dictionary, st.stk.pop(), [], "")
     st.compiling = True
 
 @new_word("immediate")
@@ -439,9 +519,11 @@ def immediate(st):
 def semicolon(st):
     """( -- ) End new word definition."""
 
+    from .optimize import optimize
     # new_col(st.compiling, st.col_stk[:], st.docstring)
     st.force_immediate = False
     st.compiling = False
+    optimize(st.latest)
     # st.col_stk.clear()
 
 
@@ -449,28 +531,40 @@ def semicolon(st):
 def docstring_start(st):
     """( -- ) Start docstring, like: `: 2drop [[ n1 n2 -- ) ]] drop drop ;`"""
 
-    start_i = st.inp_pos
-    while True:
-        word(st)
-        wd = st.stk.pop()
-        if wd == "]]":
-            break
-
-    new_word.latest.doc =  st.inp_buffer[start_i:st.inp_pos].strip().removesuffix("]]").strip()
+    lines = parse_lines(st, "]]").splitlines()
+    st.latest.doc = " ".join(line.strip() for line in lines).strip()
 
 
 @new_word("dsp@")
 def dsp_r(st):
     """( -- n ) Get location of stack pointer."""
 
-    return len(st.stk) - 1
+    st.stk.push(st.stk.sp - 1)
 
 
 @new_word("dsp!")
 def dsp_w(st):
     """( m -- ) Write location of stack pointer."""
 
-    raise NotImplementedError
+    st.stk.sp = st.stk.pop() + 1
+
+
+@new_word(">r", immediate=False)
+def to_r(st):
+    """( n -- ) ( R: -- n ) Move top item to return stack."""
+    st.ret_stack.push(st.stk.pop())
+
+
+@new_word("r>", immediate=False)
+def r_from(st):
+    """( -- n ) ( R: n -- ) Move top of return stack to stack."""
+    st.stk.push(st.ret_stack.pop())
+
+
+@new_word("r@", immediate=False)
+def r_fetch(st):
+    """( -- n ) ( R: n -- n ) Copy top of return stack to stack."""
+    st.stk.push(st.ret_stack.peek())
 
 
 @new_word("[", compilation=True, immediate=False)
@@ -493,19 +587,75 @@ def hack(st):
 
 @new_word("@")
 def at(st):
-    """( addr -- v ) Get value at address (variables only!)."""
+    """( addr -- v ) Get cell at address."""
 
-    val = st.memory[st.stk.pop()]
-    st.stk.push(val)
+    st.stk.push(st.memory.fetch(st.stk.pop()))
 
 
 @new_word("!")
 def bang(st):
-    """( v addr -- ) Set value at address."""
+    """( v addr -- ) Set cell at address."""
 
     addr = st.stk.pop()
     v = st.stk.pop()
-    st.memory[addr] = v
+    st.memory.store(addr, v)
+
+
+@new_word("c@")
+def c_at(st):
+    """( addr -- c ) Get byte at address."""
+
+    st.stk.push(st.memory.cfetch(st.stk.pop()))
+
+
+@new_word("c!")
+def c_bang(st):
+    """( c addr -- ) Set byte at address."""
+
+    addr = st.stk.pop()
+    c = st.stk.pop()
+    st.memory.cstore(addr, c)
+
+
+@new_word("base")
+def base(st):
+    """( -- addr ) Address of radix for reading and printing numbers."""
+    st.stk.push(BASE)
+
+
+@new_word("here")
+def here(st):
+    """( -- addr ) Push address of next free byte."""
+
+    st.stk.push(st.memory.here)
+
+
+@new_word("allot")
+def allot(st):
+    """( n -- ) Reserve n bytes of memory."""
+
+    st.memory.allot(st.stk.pop())
+
+
+@new_word("align")
+def align(st):
+    """( -- ) Align here to a cell boundary."""
+
+    st.memory.align()
+
+
+@new_word("cells")
+def cells(st):
+    """( n1 -- n2 ) Size in bytes of n1 cells."""
+
+    st.stk.push(st.stk.pop() * CELL)
+
+
+@new_word("cell+")
+def cell_plus(st):
+    """( addr1 -- addr2 ) Add size of a cell to address."""
+
+    st.stk.push(st.stk.pop() + CELL)
 
 
 @new_word("variable")
@@ -514,19 +664,382 @@ def variable(st):
 
     word(st)
     name = st.stk.pop()
-    st.memory.append(None)
-    addr = len(st.memory) - 1
-    new_col(name, [addr])
+    st.memory.align()
+    addr = st.memory.here
+    st.memory.comma(0)
+    new_col(st.dictionary, name, [addr])
 
 
 @new_word("'")
 def tick(st):
-    """( -- addr ) Kinda worthless right now. FIXME."""
+    """( -- xt ) Execution token of next word, for `execute` or `activate`."""
     word(st)
     find(st)
-    st.stk.push(id(st.stk.pop()))
+    st.stk.push(st.stk.pop().xt)
 
 
 @new_word("end")
 def end(st):
     return
+
+
+@new_word("=")
+def equals(st):
+    """( n1 n2 -- flag ) True if n1 = n2."""
+    st.stk.push(-(st.stk.pop() == st.stk.pop()))
+
+
+@new_word("<")
+def less(st):
+    """( n1 n2 -- flag ) True if n1 < n2."""
+    n2 = st.stk.pop()
+    st.stk.push(-(st.stk.pop() < n2))
+
+
+@new_word(">")
+def greater(st):
+    """( n1 n2 -- flag ) True if n1 > n2."""
+    n2 = st.stk.pop()
+    st.stk.push(-(st.stk.pop() > n2))
+
+
+@new_word("0=")
+def zero_eq(st):
+    """( n -- flag ) True if n is zero."""
+    st.stk.push(-(st.stk.pop() == 0))
+
+
+@new_word("0<")
+def zero_less(st):
+    """( n -- flag ) True if n is negative."""
+    st.stk.push(-(st.stk.pop() < 0))
+
+
+# Control flow
+#
+# if/else/then and friends compile `branch`/`0branch` followed by an
+# offset cell; loops compile `(do)` ... `(loop)` with the loop's limit
+# and index kept on the return stack. Offsets are relative to the
+# offset cell and are resolved while compiling, using the data stack
+# for unresolved locations, as Forth does. When a colon word is
+# threaded, each branch becomes an op returning the index to go to.
+
+def _mark(st):
+    """Compile a placeholder offset; return its index."""
+
+    st.latest.append(0)
+    return len(st.latest.body) - 1
+
+
+def _resolve(st, at, target):
+    """Point the offset at index `at` to index `target`."""
+
+    st.latest.put(at, target - at)
+
+
+def _here(st):
+    return len(st.latest.body)
+
+
+def _not_threaded(name):
+    raise ForthError(f"{name} can only be compiled by control words")
+
+
+@new_word("branch", compilation=True, immediate=False)
+def branch(st):
+    """( -- ) Jump by following offset; compiled by else/again/repeat."""
+    _not_threaded("branch")
+
+
+@new_word("0branch", compilation=True, immediate=False)
+def zero_branch(st):
+    """( flag -- ) Jump by following offset if flag is false."""
+    _not_threaded("0branch")
+
+
+def _thread_branch(words, i):
+    target = i + 1 + words[i + 1]
+    return lambda st: target
+
+
+def _thread_zero_branch(words, i):
+    target = i + 1 + words[i + 1]
+    skip = i + 2
+
+    def zbranch(st):
+        return skip if st.stk.pop() else target
+
+    return zbranch
+
+
+branch.threader = _thread_branch
+zero_branch.threader = _thread_zero_branch
+
+
+@new_word("if", compilation=True, immediate=False)
+def if_(st):
+    """( flag -- ) Run up to else/then only if flag is true."""
+
+    st.latest.append(zero_branch)
+    st.stk.push(_mark(st))
+
+
+@new_word("else", compilation=True, immediate=False)
+def else_(st):
+    """( -- ) Run up to then only if flag given to if was false."""
+
+    orig = st.stk.pop()
+    st.latest.append(branch)
+    st.stk.push(_mark(st))
+    _resolve(st, orig, _here(st))
+
+
+@new_word("then", compilation=True, immediate=False)
+def then(st):
+    """( -- ) End if or if/else."""
+
+    _resolve(st, st.stk.pop(), _here(st))
+
+
+@new_word("begin", compilation=True, immediate=False)
+def begin(st):
+    """( -- ) Start begin/until, begin/again or begin/while/repeat loop."""
+
+    st.stk.push(_here(st))
+
+
+@new_word("until", compilation=True, immediate=False)
+def until(st):
+    """( flag -- ) Loop back to begin unless flag is true."""
+
+    dest = st.stk.pop()
+    st.latest.append(zero_branch)
+    _resolve(st, _mark(st), dest)
+
+
+@new_word("again", compilation=True, immediate=False)
+def again(st):
+    """( -- ) Loop back to begin."""
+
+    dest = st.stk.pop()
+    st.latest.append(branch)
+    _resolve(st, _mark(st), dest)
+
+
+@new_word("while", compilation=True, immediate=False)
+def while_(st):
+    """( flag -- ) Leave begin/while/repeat loop if flag is false."""
+
+    dest = st.stk.pop()
+    st.latest.append(zero_branch)
+    st.stk.push(_mark(st))
+    st.stk.push(dest)
+
+
+@new_word("repeat", compilation=True, immediate=False)
+def repeat(st):
+    """( -- ) Loop back to begin."""
+
+    dest = st.stk.pop()
+    orig = st.stk.pop()
+    st.latest.append(branch)
+    _resolve(st, _mark(st), dest)
+    _resolve(st, orig, _here(st))
+
+
+@new_word("(do)", immediate=False)
+def paren_do(st):
+    """( limit start -- ) Start counted loop."""
+
+    start = st.stk.pop()
+    st.ret_stack.push(st.stk.pop())
+    st.ret_stack.push(start)
+
+
+@new_word("(?do)", compilation=True, immediate=False)
+def paren_qdo(st):
+    """( limit start -- ) Start counted loop; skip it if limit = start."""
+    _not_threaded("(?do)")
+
+
+@new_word("(loop)", compilation=True, immediate=False)
+def paren_loop(st):
+    """( -- ) Step counted loop by 1."""
+    _not_threaded("(loop)")
+
+
+@new_word("(+loop)", compilation=True, immediate=False)
+def paren_plus_loop(st):
+    """( n -- ) Step counted loop by n."""
+    _not_threaded("(+loop)")
+
+
+@new_word("(leave)", compilation=True, immediate=False)
+def paren_leave(st):
+    """( -- ) Drop loop parameters and jump out of loop."""
+    _not_threaded("(leave)")
+
+
+def _thread_qdo(words, i):
+    target = i + 1 + words[i + 1]
+    skip = i + 2
+
+    def qdo(st):
+        start = st.stk.pop()
+        limit = st.stk.pop()
+        if start == limit:
+            return target
+        st.ret_stack.push(limit)
+        st.ret_stack.push(start)
+        return skip
+
+    return qdo
+
+
+def _thread_loop(words, i):
+    target = i + 1 + words[i + 1]
+    skip = i + 2
+
+    def loop(st):
+        rs = st.ret_stack
+        index = rs.pop() + 1
+        if index != rs.peek():
+            rs.push(index)
+            return target
+        rs.pop()
+        return skip
+
+    return loop
+
+
+def _thread_plus_loop(words, i):
+    target = i + 1 + words[i + 1]
+    skip = i + 2
+
+    def plus_loop(st):
+        rs = st.ret_stack
+        old = rs.pop()
+        new = old + st.stk.pop()
+        limit = rs.peek()
+        # done once index crosses the boundary between limit-1 and limit
+        if (old - limit) ^ (new - limit) >= 0:
+            rs.push(new)
+            return target
+        rs.pop()
+        return skip
+
+    return plus_loop
+
+
+def _thread_leave(words, i):
+    target = i + 1 + words[i + 1]
+
+    def leave_(st):
+        st.ret_stack.pop()
+        st.ret_stack.pop()
+        return target
+
+    return leave_
+
+
+paren_qdo.threader = _thread_qdo
+paren_loop.threader = _thread_loop
+paren_plus_loop.threader = _thread_plus_loop
+paren_leave.threader = _thread_leave
+
+
+@new_word("do", compilation=True, immediate=False)
+def do(st):
+    """( limit start -- ) Loop from start up to limit: `10 0 do i . loop`."""
+
+    st.latest.append(paren_do)
+    st.leaves.append([])
+    st.stk.push(_here(st))
+
+
+@new_word("?do", compilation=True, immediate=False)
+def q_do(st):
+    """( limit start -- ) Like do, but skip loop if limit = start."""
+
+    st.latest.append(paren_qdo)
+    st.leaves.append([_mark(st)])
+    st.stk.push(_here(st))
+
+
+def _end_loop(st, op):
+    if not st.leaves:
+        raise ForthError("loop without do")
+    dest = st.stk.pop()
+    st.latest.append(op)
+    _resolve(st, _mark(st), dest)
+    for at in st.leaves.pop():
+        _resolve(st, at, _here(st))
+
+
+@new_word("loop", compilation=True, immediate=False)
+def loop(st):
+    """( -- ) Add 1 to index; loop back to do until it reaches limit."""
+    _end_loop(st, paren_loop)
+
+
+@new_word("+loop", compilation=True, immediate=False)
+def plus_loop(st):
+    """( n -- ) Add n to index; loop back to do until it crosses limit."""
+    _end_loop(st, paren_plus_loop)
+
+
+@new_word("leave", compilation=True, immediate=False)
+def leave(st):
+    """( -- ) Leave innermost do loop now."""
+
+    if not st.leaves:
+        raise ForthError("leave outside do loop")
+    st.latest.append(paren_leave)
+    st.leaves[-1].append(_mark(st))
+
+
+@new_word("i", immediate=False)
+def i_(st):
+    """( -- n ) Index of innermost do loop."""
+    st.stk.push(st.ret_stack.peek())
+
+
+@new_word("j", immediate=False)
+def j_(st):
+    """( -- n ) Index of next-outer do loop."""
+
+    rs = st.ret_stack
+    index = rs.pop()
+    limit = rs.pop()
+    st.stk.push(rs.peek())
+    rs.push(limit)
+    rs.push(index)
+
+
+@new_word("unloop", immediate=False)
+def unloop(st):
+    """( -- ) Drop loop parameters, to exit from inside a do loop."""
+
+    st.ret_stack.pop()
+    st.ret_stack.pop()
+
+
+@new_word("exit", immediate=False)
+def exit_(st):
+    """( -- ) Return from colon word now."""
+    # nothing to do outside threaded code, where it jumps to the end
+
+
+def _thread_exit(words, i):
+    end = len(words)
+    return lambda st: end
+
+
+exit_.threader = _thread_exit
+exit_.operand = False
+
+
+@new_word("recurse", compilation=True, immediate=False)
+def recurse(st):
+    """( -- ) Compile call to the word being defined."""
+    st.latest.append(st.latest)
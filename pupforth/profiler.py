@@ -0,0 +1,128 @@
+"""Per-word profiler.
+
+While profiling is on, colon words are rethreaded so every call they
+make to a word goes through Profiler.call, as do words run by
+`execute`. With it off, threaded code is rebuilt without the wrappers,
+so the only cost left is `execute` checking `st.profiler`.
+
+For each word we count calls, self time (not counting words it called)
+and cumulative time (counting them, but only for the outermost call
+when it recurses), and self time by call path for flame graphs.
+"""
+
+from time import perf_counter_ns
+
+from .primitives import word
+from .words import new_word, rethread
+
+
+class Profiler:
+    def __init__(self):
+        self.stats = {}     # id(word) -> [word, calls, self ns, cum ns]
+        self.active = {}    # id(word) -> how many calls of it are running
+        self.frames = []    # [word, start ns, ns spent in callees]
+        self.paths = {}     # tuple of word names -> self ns
+
+    def call(self, w, fn, st):
+        """Run fn(st) as a call of w."""
+
+        frames = self.frames
+        frame = [w, perf_counter_ns(), 0]
+        frames.append(frame)
+        key = id(w)
+        self.active[key] = self.active.get(key, 0) + 1
+        try:
+            fn(st)
+        finally:
+            elapsed = perf_counter_ns() - frame[1]
+            own = elapsed - frame[2]
+            path = tuple(f[0].name for f in frames)
+            frames.pop()
+            if frames:
+                frames[-1][2] += elapsed
+
+            depth = self.active[key] - 1
+            self.active[key] = depth
+            stat = self.stats.get(key)
+            if stat is None:
+                stat = self.stats[key] = [w, 0, 0, 0]
+            stat[1] += 1
+            stat[2] += own
+            if not depth:
+                stat[3] += elapsed
+            self.paths[path] = self.paths.get(path, 0) + own
+
+    def wrap(self, w, fn):
+        """Return function that runs fn as a profiled call of w."""
+
+        def profiled(st):
+            self.call(w, fn, st)
+
+        return profiled
+
+    def report(self, limit=None, file=None):
+        """Print hot-word table, by self time, to file (or stdout)."""
+
+        rows = sorted(self.stats.values(), key=lambda r: r[2], reverse=True)
+        total = sum(r[2] for r in rows) or 1
+        print(f"{'calls':>10} {'self ms':>10} {'cum ms':>10} {'self%':>6}  word",
+              file=file)
+        for w, calls, own, cum in rows[:limit]:
+            print(f"{calls:>10} {own / 1e6:>10.3f} {cum / 1e6:>10.3f} "
+                  f"{own / total:>6.1%}  {w.name}", file=file)
+
+    def write_stacks(self, path):
+        """Write collapsed stacks (self microseconds), for flame graphs."""
+
+        with open(path, "w") as f:
+            for names, ns in sorted(self.paths.items()):
+                f.write(f"{';'.join(names)} {ns // 1000}\n")
+
+
+def start(st):
+    st.profiler = Profiler()
+    rethread(st)
+
+
+def stop(st):
+    if st.profiler:
+        st.last_profile = st.profiler
+        st.profiler = None
+        rethread(st)
+
+
+@new_word("profile-on")
+def profile_on(st):
+    """( -- ) Start profiling, clearing any earlier profile."""
+    start(st)
+
+
+@new_word("profile-off")
+def profile_off(st):
+    """( -- ) Stop profiling."""
+    stop(st)
+
+
+@new_word(".profile")
+def dot_profile(st):
+    """( -- ) Show hot words of current or last profile."""
+
+    prof = st.profiler or st.last_profile
+    if not prof:
+        print("No profile: use profile-on", file=st.out)
+    else:
+        prof.report(file=st.out)
+
+
+@new_word("profile-stacks")
+def profile_stacks(st):
+    """( -- ) Write profile stacks to file named by next word."""
+
+    word(st)
+    path = st.stk.pop()
+    prof = st.profiler or st.last_profile
+    if not prof:
+        print("No profile: use profile-on", file=st.out)
+    else:
+        st.effects += 1
+        prof.write_stacks(path)
@@ -0,0 +1,75 @@
+"""Headless batch runner for Pupforth.
+
+Run like:
+
+    $ echo "1 2 + ." | pupforth-run
+    $ python3 -m pupforth.run [--no-stdlib] [--no-cache] [--image FILE] FILE...
+
+Loads the standard library (or an image), then the given files, then
+any piped stdin, and exits: no greeting, no REPL. It imports only what
+running Forth needs (no click or prompt_toolkit), so it starts faster
+than `pupforth -q`. Exit status is 1 if any Forth error happened.
+"""
+
+import os
+import sys
+
+from . import cache
+from .exceptions import ForthError, ForthBye
+from .image import load_image
+from .main import process, State
+
+USAGE = "usage: pupforth-run [--no-stdlib] [--no-cache] [--image FILE] FILE..."
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    no_stdlib = no_cache = False
+    image = None
+    files = []
+    while args:
+        arg = args.pop(0)
+        if arg == "--no-stdlib":
+            no_stdlib = True
+        elif arg == "--no-cache":
+            no_cache = True
+        elif arg == "--image" and args:
+            image = args.pop(0)
+        elif arg in ("-h", "--help") or arg.startswith("-"):
+            print(USAGE, file=sys.stderr)
+            return 0 if arg in ("-h", "--help") else 2
+        else:
+            files.append(arg)
+
+    st = State()
+    if image:
+        load_image(st, image)
+    elif not no_stdlib:
+        files.insert(0, os.path.join(os.path.dirname(__file__), "lib.f"))
+
+    status = 0
+    try:
+        for path in files:
+            try:
+                with open(path) as f:
+                    cache.load_source(st, f.read(), not no_cache, path)
+            except ForthError as e:
+                print(f"{e} --- rest of file ignored")
+                status = 1
+
+        if not sys.stdin.isatty():
+            for line in sys.stdin:
+                try:
+                    process(st, line)
+                except ForthError as e:
+                    print(e)
+                    status = 1
+    except ForthBye:
+        pass
+    finally:
+        st.out.flush()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
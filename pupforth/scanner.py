@@ -0,0 +1,150 @@
+"""Scanning the input buffer, and the sources that fill it.
+
+Every parsing word (`word`, `s"`, `(`, `\\`, `[[`, ...) goes through
+these, so they share one notion of where the input is. They slice
+`st.inp_buffer` from `st.inp_pos` rather than walking it by character,
+and leave `inp_pos` just past the delimiter that ended the scan.
+
+The input buffer holds one line. A line given to process() is all
+there is; a file (or other whole text, see Source) is read into memory
+at once and refilled into the buffer a line at a time, so definitions
+and `( ... )` comments can run across lines. Including a file pushes
+its Source onto `st.sources` and pops it at the end, so includes nest.
+
+`inp_pos` is a plain attribute, for speed; `>in` gives Forth code a
+cell to read and write it through. Once that has been asked for, the
+scanner (and the loops interpreting the line, after each word) take
+the position from the cell and put it back, until the next line.
+"""
+
+import re
+
+from .memory import IN
+
+_NAME = re.compile(r"\S+")
+
+
+class Source:
+    """Whole text of a file (or string), handed out a line at a time."""
+
+    def __init__(self, text, path=None):
+        self.text = text
+        self.path = path
+        self.pos = 0        # where next line starts in text
+        self.line = 0       # number of line in input buffer
+
+    def next_line(self):
+        """Next line (without its newline), or None at end of text."""
+
+        text = self.text
+        start = self.pos
+        if start >= len(text):
+            return None
+        end = text.find("\n", start)
+        if end == -1:
+            end = len(text)
+        self.pos = end + 1
+        self.line += 1
+        return text[start:end]
+
+
+def refill(st):
+    """Read next line of current source into input buffer.
+
+    Returns False at end of source, or if input isn't from one (a
+    line given to process() has nothing after it).
+    """
+
+    line = st.source.next_line() if st.source else None
+    if line is None:
+        return False
+    st.inp_buffer = line
+    st.inp_pos = 0
+    st.in_shared = False
+    return True
+
+
+def interpret_source(st, source):
+    """Interpret all of source, then go back to the input before it."""
+
+    st.sources.append((st.source, st.inp_buffer, st.inp_pos, st.in_shared))
+    st.source = source
+    try:
+        while refill(st):
+            while more_input(st):
+                st.interpret()
+    finally:
+        st.source, st.inp_buffer, st.inp_pos, st.in_shared = st.sources.pop()
+        if st.in_shared:
+            # source may have used the >in cell for its own lines
+            st.memory.store(IN, st.inp_pos)
+
+
+def more_input(st):
+    """Whether anything is left to parse, wherever `>in` was set to."""
+
+    if st.in_shared:
+        st.inp_pos = st.memory.fetch(IN)
+    return st.inp_pos < len(st.inp_buffer)
+
+
+def parse_name(st):
+    """Skip whitespace and return next whitespace-delimited name.
+
+    Returns "" if there is nothing left but whitespace.
+    """
+
+    if st.in_shared:
+        st.inp_pos = st.memory.fetch(IN)
+    mo = _NAME.search(st.inp_buffer, st.inp_pos)
+    if mo is None:
+        st.inp_pos = len(st.inp_buffer)
+        tok = ""
+    else:
+        st.inp_pos = mo.end() + 1
+        tok = mo.group()
+    if st.in_shared:
+        st.memory.store(IN, st.inp_pos)
+    return tok
+
+
+def _parse(st, delim):
+    """Return (text up to delim or end of input, whether delim was found)."""
+
+    if st.in_shared:
+        st.inp_pos = st.memory.fetch(IN)
+    buf = st.inp_buffer
+    start = st.inp_pos
+    end = buf.find(delim, start)
+    if end == -1:
+        st.inp_pos = len(buf)
+        found = (buf[start:], False)
+    else:
+        st.inp_pos = end + len(delim)
+        found = (buf[start:end], True)
+    if st.in_shared:
+        st.memory.store(IN, st.inp_pos)
+    return found
+
+
+def parse(st, delim):
+    """Return text up to delim (or end of input), consuming delim.
+
+    Unlike parse_name, leading whitespace is kept.
+    """
+
+    return _parse(st, delim)[0]
+
+
+def parse_lines(st, delim):
+    """Like parse, but if delim isn't on this line, carry on refilling.
+
+    Lines are joined with newlines. Stops at end of source.
+    """
+
+    text, found = _parse(st, delim)
+    lines = [text]
+    while not found and refill(st):
+        text, found = _parse(st, delim)
+        lines.append(text)
+    return "\n".join(lines)
@@ -0,0 +1,221 @@
+"""Server: isolated interpreter sessions over TCP or a Unix socket.
+
+Run like:
+
+    $ pupforth-serve                                # localhost:4242
+    $ pupforth-serve --port 5000 --max-sessions 100 --idle-timeout 60
+    $ pupforth-serve --unix /tmp/pupforth.sock
+    $ echo ": sq dup * ; 7 sq ." | nc -q1 localhost 4242
+
+Each connection gets a Session of its own (see session.py): lines read
+from it are interpreted in turn, and what they print is sent back, with
+any error as a line after it. `bye` or end of input closes the session.
+
+Lines are interpreted in threads, as is the standard library loaded
+into a new session, so a long-running word doesn't hold up other
+sessions: the event loop and the other sessions get their turn
+whenever Python switches threads (every few ms). A session's output
+goes straight to its connection; once the connection's write buffer
+holds --output-buffer bytes, the session's thread waits for the client
+to read some.
+
+Limits: --max-sessions at once (more are told so and closed),
+--idle-timeout seconds waiting for a line or for the client to read
+output, --max-line bytes in a line, and --max-time seconds for a line,
+after which the running word is interrupted with a Timeout error.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import ctypes
+import functools
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import ForthError, ForthBye, Timeout
+from .session import Session
+
+CHUNK = 4096        # bytes of output to gather before sending
+
+
+def _async_raise(thread_id, exc):
+    """Raise exc in thread thread_id when it next runs Python (None: don't)."""
+
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+        ctypes.c_ulong(thread_id), ctypes.py_object(exc) if exc else None)
+
+
+class _Output:
+    """Output of a session, sent down its connection.
+
+    Written from the session's thread, which blocks until the event loop
+    has handed the data to the connection (and, if its buffer is full,
+    until the client has read enough of it).
+    """
+
+    def __init__(self, writer, loop, timeout):
+        self.writer = writer
+        self.loop = loop
+        self.timeout = timeout
+        self.buf = []
+        self.size = 0
+
+    def write(self, s):
+        self.buf.append(s)
+        self.size += len(s)
+        if self.size >= CHUNK:
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        if self.buf:
+            data = "".join(self.buf).encode()
+            self.buf.clear()
+            self.size = 0
+            asyncio.run_coroutine_threadsafe(self._send(data), self.loop).result()
+
+    async def _send(self, data):
+        self.writer.write(data)
+        await asyncio.wait_for(self.writer.drain(), self.timeout)
+
+
+class _Connection:
+    """A client's session, and the thread running a line of it, if any."""
+
+    def __init__(self, session):
+        self.session = session
+        self.lock = threading.Lock()
+        self.thread = None      # thread running a line, while it does
+
+    def interpret(self, line):
+        """Interpret line (in an executor thread); return error or None."""
+
+        try:
+            try:
+                with self.lock:
+                    self.thread = threading.get_ident()
+                self.session.feed(line)
+            finally:
+                with self.lock:
+                    # an interrupt that came too late must not go off later
+                    _async_raise(self.thread, None)
+                    self.thread = None
+                self.session.output.flush()
+        except Timeout:
+            return "Timed out"
+        except ForthError as e:
+            return str(e)
+        return None
+
+    def interrupt(self):
+        """Stop the running line with a Timeout, if one is running."""
+
+        with self.lock:
+            if self.thread is not None:
+                _async_raise(self.thread, Timeout)
+
+
+class Server:
+    """Accepts connections and runs a session for each."""
+
+    def __init__(self, max_sessions=64, idle_timeout=300, max_time=0,
+                 output_buffer=64 * 1024, use_cache=True):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout or None
+        self.max_time = max_time
+        self.output_buffer = output_buffer
+        self.use_cache = use_cache
+        self.sessions = 0
+        self.executor = ThreadPoolExecutor(max_sessions, "pupforth-session")
+
+    async def handle(self, reader, writer):
+        if self.sessions >= self.max_sessions:
+            writer.write(b"Too many sessions\n")
+            await self._close(writer)
+            return
+
+        self.sessions += 1
+        loop = asyncio.get_running_loop()
+        writer.transport.set_write_buffer_limits(high=self.output_buffer)
+        output = _Output(writer, loop, self.idle_timeout)
+        conn = None
+        try:
+            # loading lib.f would hold up every other session
+            session = await loop.run_in_executor(self.executor, functools.partial(
+                Session, use_cache=self.use_cache, output=output))
+            conn = _Connection(session)
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except TimeoutError:
+                    writer.write(b"Idle timeout\n")
+                    break
+                except ValueError:
+                    writer.write(b"Line too long\n")
+                    break
+                if not line:
+                    break
+                timer = self.max_time and loop.call_later(self.max_time, conn.interrupt)
+                try:
+                    error = await loop.run_in_executor(
+                        self.executor, conn.interpret, line.decode(errors="replace"))
+                except (ForthBye, OSError):     # OSError: client went away
+                    break
+                finally:
+                    if timer:
+                        timer.cancel()
+                if error:
+                    writer.write(f"{error}\n".encode())
+        finally:
+            self.sessions -= 1
+            if conn:
+                conn.session.close()
+            await self._close(writer)
+
+    @staticmethod
+    async def _close(writer):
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+
+    async def serve(self, host="localhost", port=4242, unix=None, max_line=64 * 1024):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, unix, limit=max_line)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=max_line)
+        where = ", ".join(str(s.getsockname()) for s in server.sockets)
+        print(f"pupforth-serve: listening on {where}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pupforth-serve", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=4242)
+    parser.add_argument("--unix", metavar="PATH", help="serve on Unix socket")
+    parser.add_argument("--max-sessions", type=int, default=64)
+    parser.add_argument("--idle-timeout", type=float, default=300,
+                        help="seconds (0: no limit)")
+    parser.add_argument("--max-time", type=float, default=0,
+                        help="seconds to run a line (0: no limit)")
+    parser.add_argument("--max-line", type=int, default=64 * 1024, help="bytes")
+    parser.add_argument("--output-buffer", type=int, default=64 * 1024,
+                        help="bytes of unread output before a session waits")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    server = Server(args.max_sessions, args.idle_timeout, args.max_time,
+                    args.output_buffer, use_cache=not args.no_cache)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix, args.max_line))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Embedding API: isolated Forth sessions in one Python process.
+
+Use like::
+
+    from pupforth.session import Session
+
+    with Session() as s:
+        s.feed(": sq dup * ; 7 sq .")
+        s.read()                # -> "49 "
+
+Each session has its own State: stacks, data space and dictionary, so
+words defined, hidden or forgotten in one are never seen by another.
+All of them start from the one set of primitives, shared copy-on-write
+(see words.Dictionary), and the standard library is replayed from the
+source cache (see cache.py), so making a session is cheap.
+
+Output is captured per session: each session's State writes to its
+own Output (see output.py), whose sink is the session's output, so
+sessions can run in several threads at once.
+"""
+
+import io
+import os
+
+from . import cache, trace
+from .image import load_image
+from .main import process_source, State
+from .output import Output
+from .stack import Stack
+
+STDLIB = os.path.join(os.path.dirname(__file__), "lib.f")
+_stdlib_text = None
+
+
+def stdlib_text():
+    """Source of the standard library, read once."""
+
+    global _stdlib_text
+    if _stdlib_text is None:
+        with open(STDLIB) as f:
+            _stdlib_text = f.read()
+    return _stdlib_text
+
+
+class Session:
+    """One Forth interpreter, with its output kept to be read.
+
+    stdlib: load the standard library (unless image is given)
+    image: start from this saved image instead
+    stack_class: Stack or CellStack, as for State
+    use_cache: replay/fill the source cache when loading the library
+    output: file-like object to write output to, instead of keeping it
+    """
+
+    def __init__(self, stdlib=True, image=None, stack_class=Stack, use_cache=True,
+                 output=None):
+        self.output = io.StringIO() if output is None else output
+        self.st = State(stack_class, Output(self.output))
+        if image:
+            load_image(self.st, image)
+        elif stdlib:
+            self.load(stdlib_text(), use_cache)
+
+    def _state(self):
+        if self.st is None:
+            raise ValueError("Session is closed")
+        return self.st
+
+    def load(self, text, use_cache=True):
+        """Interpret the text of a whole file, through the source cache."""
+
+        st = self._state()
+        try:
+            cache.load_source(st, text, use_cache)
+        finally:
+            st.out.flush()
+
+    def feed(self, source):
+        """Interpret source, which may run over lines; output is kept for read().
+
+        Errors raise ForthError, as from process(), with any output from
+        before them kept for read(); `bye` raises ForthBye.
+        """
+
+        st = self._state()
+        try:
+            process_source(st, source, show_traceback=False)
+        finally:
+            st.out.flush()
+
+    def read(self):
+        """Output since last read (unless given an output to write to)."""
+
+        out = self.output.getvalue()
+        self.output.seek(0)
+        self.output.truncate()
+        return out
+
+    @property
+    def stack(self):
+        """Data stack, as a list, bottom first."""
+        return list(self._state().stk)
+
+    def close(self):
+        """Free the session, ending any trace; it can't be fed again."""
+
+        if self.st is not None:
+            trace.stop(self.st)
+            self.st = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,4 +1,9 @@
-from .exceptions import StackUnderflow
+import array
+
+from .exceptions import StackUnderflow, StackOverflow
+
+CELL_MIN = -2 ** 63
+CELL_MAX = 2 ** 63 - 1
 
 
 class Stack(list):
@@ -18,3 +23,112 @@ class Stack(list):
             return super().pop(index)
         except IndexError:
             raise StackUnderflow("Stack underflow")
+
+    @property
+    def sp(self):
+        """Number of items (index of next free slot)."""
+        return len(self)
+
+    @sp.setter
+    def sp(self, new_sp):
+        if new_sp < 0:
+            raise StackUnderflow("Stack underflow")
+        del self[new_sp:]
+        self.extend([0] * (new_sp - len(self)))
+
+
+class CellStack:
+    """Stack of 64-bit cells in a preallocated array.
+
+    Ints that fit in a cell are stored unboxed. Anything else the
+    interpreter puts on the stack (tokens, words, strings, bigger ints)
+    is kept in `boxed`, keyed by slot, with its slot flagged in `tags`.
+
+    Starts with room for `cells` items, doubling when full up to
+    `max_cells`, so deep recursion fits on a return stack as it does
+    on a list.
+    """
+
+    def __init__(self, cells=1024, max_cells=1 << 20):
+        self.cells = array.array("q", bytes(8 * cells))
+        self.mv = memoryview(self.cells)
+        self.tags = bytearray(cells)
+        self.boxed = {}
+        self.size = cells
+        self.max_size = max(cells, max_cells)
+        self._sp = 0
+
+    def _grow(self, need):
+        """Make room for need items, or raise StackOverflow."""
+
+        if need > self.max_size:
+            raise StackOverflow("Stack overflow")
+        size = min(max(need, 2 * self.size), self.max_size)
+        self.mv.release()   # an array can't resize while viewed
+        self.cells.frombytes(bytes(8 * (size - self.size)))
+        self.mv = memoryview(self.cells)
+        self.tags.extend(bytes(size - self.size))
+        self.size = size
+
+    def __len__(self):
+        return self._sp
+
+    def __iter__(self):
+        mv = self.mv
+        tags = self.tags
+        boxed = self.boxed
+        for i in range(self._sp):
+            yield boxed[i] if tags[i] else mv[i]
+
+    def __repr__(self):
+        return f"<CellStack {list(self)!r}>"
+
+    @property
+    def sp(self):
+        """Number of items (index of next free slot)."""
+        return self._sp
+
+    @sp.setter
+    def sp(self, new_sp):
+        if new_sp < 0:
+            raise StackUnderflow("Stack underflow")
+        if new_sp > self.size:
+            self._grow(new_sp)
+        for i in range(new_sp, self._sp):
+            self.boxed.pop(i, None)
+        # cells uncovered by growing hold whatever int was there
+        self.tags[self._sp:new_sp] = bytes(max(0, new_sp - self._sp))
+        self._sp = new_sp
+
+    def push(self, val):
+        sp = self._sp
+        if sp == self.size:
+            self._grow(sp + 1)
+        if type(val) is int and CELL_MIN <= val <= CELL_MAX:
+            self.mv[sp] = val
+            self.tags[sp] = 0
+        else:
+            self.boxed[sp] = val
+            self.tags[sp] = 1
+        self._sp = sp + 1
+
+    def pop(self):
+        sp = self._sp - 1
+        if sp < 0:
+            raise StackUnderflow("Stack underflow")
+        self._sp = sp
+        if self.tags[sp]:
+            return self.boxed.pop(sp)
+        return self.mv[sp]
+
+    def peek(self):
+        sp = self._sp - 1
+        if sp < 0:
+            raise StackUnderflow("Stack underflow")
+        if self.tags[sp]:
+            return self.boxed[sp]
+        return self.mv[sp]
+
+    def clear(self):
+        self._sp = 0
+        self.boxed.clear()
@@ -0,0 +1,171 @@
+"""Cooperative multitasking: tasks taking turns in one State.
+
+    variable ticks
+    : ticker  begin 1 ticks +! pause again ;
+    task: t1
+    ' ticker t1 activate
+    pause pause ticks @ .   \\ 2
+
+A task runs a word, with data and return stacks of its own. Tasks only
+switch at `pause`: the main task (the one reading input) gives each
+awake task, round-robin, a turn that lasts until its next pause, and
+then goes on itself. `stop` is a pause that also puts the task to sleep
+until something `wake`s it; a task whose word ends goes to sleep for
+good, until activated again. An error in a task is shown, and ends it.
+
+Switching is cheap: in threaded code, pause makes the inner interpreter
+push where it was onto the task's return stack and return; the task's
+next turn goes on from there. So a task can pause in any colon word it
+calls -- but not in one called from Python (by `execute`, or anything
+while profiling or tracing), which is an error.
+"""
+
+from .exceptions import ForthError, Timeout
+from .primitives import word
+from .words import new_word, new_col, inner, PAUSE, PrimWord, ColWord, _call
+
+
+class Task:
+    """Stacks of a task, and where it's to go on from."""
+
+    def __init__(self, name, stack_class):
+        self.name = name
+        self.stk = stack_class()
+        self.ret_stack = stack_class()
+        self.resume = None      # (code, ip) for next turn, or None: ended
+        self.awake = False
+
+    def __repr__(self):
+        return f"<Task {self.name}>"
+
+
+def _turn(st, task):
+    """Switch to task and run it until it pauses or ends."""
+
+    saved = st.stk, st.ret_stack, st.task
+    st.stk, st.ret_stack, st.task = task.stk, task.ret_stack, task
+    paused = False
+    try:
+        code, ip = task.resume
+        paused = inner(st, code, ip, 0, top=True)
+    except Timeout:
+        raise
+    except ForthError as e:
+        st.out.write(f"Task {task.name}: {e}\n")
+    finally:
+        st.stk, st.ret_stack, st.task = saved
+        if paused:
+            task.resume = task.ret_stack.pop()
+        else:
+            task.resume = None
+            task.awake = False
+
+
+def run_others(st):
+    """Pause the main task: give each awake task a turn."""
+
+    if st.task is not None:
+        raise ForthError("Cannot pause in a word called from Python")
+    for task in st.tasks:
+        if task.awake:
+            _turn(st, task)
+
+
+def _pop_task(st):
+    task = st.stk.pop()
+    if not isinstance(task, Task):
+        raise ForthError(f"Not a task: {task!r}")
+    return task
+
+
+def _sleep(st):
+    if st.task is None:
+        raise ForthError("Main task cannot stop")
+    st.task.awake = False
+
+
+@new_word("task:")
+def task_colon(st):
+    """( -- ) Make task named by next word: `task: t1`."""
+
+    word(st)
+    name = st.stk.pop()
+    task = Task(name, type(st.stk))
+    st.tasks.append(task)
+    new_col(st.dictionary, name, [task])
+
+
+@new_word("activate")
+def activate(st):
+    """( w task -- ) Start task running word w (from `find` or `'`)."""
+
+    task = _pop_task(st)
+    w = st.stk.pop()
+    if type(w) is int:
+        w = st.dictionary.word_at(w)
+    if isinstance(w, ColWord):
+        code = [_call(w)]
+    elif isinstance(w, PrimWord):
+        code = [w.code]
+    else:
+        raise ForthError(f"Not a word: {w!r}")
+    if task is st.task:
+        raise ForthError(f"Task {task.name} cannot activate itself")
+    task.stk.clear()
+    task.ret_stack.clear()
+    task.resume = (code, 0)
+    task.awake = True
+
+
+@new_word("pause")
+def pause(st):
+    """( -- ) Let other tasks run."""
+    run_others(st)
+
+
+def _pause_op(st):
+    return PAUSE
+
+
+def _stop_op(st):
+    _sleep(st)
+    return PAUSE
+
+
+pause.threader = lambda words, i: _pause_op
+pause.operand = False
+
+
+@new_word("stop")
+def stop(st):
+    """( -- ) Put this task to sleep, and let other tasks run."""
+
+    _sleep(st)
+    run_others(st)
+
+
+stop.threader = lambda words, i: _stop_op
+stop.operand = False
+
+
+@new_word("wake")
+def wake(st):
+    """( task -- ) Wake task, unless it has ended."""
+
+    task = _pop_task(st)
+    task.awake = task.resume is not None
+
+
+@new_word("sleep")
+def sleep(st):
+    """( task -- ) Put task to sleep."""
+
+    _pop_task(st).awake = False
+
+
+@new_word("run-tasks")
+def run_tasks(st):
+    """( -- ) Pause until no task is awake."""
+
+    while any(task.awake for task in st.tasks):
+        run_others(st)
@@ -0,0 +1,186 @@
+"""Execution tracing to a ring buffer.
+
+While tracing is on, every word run by `execute` or called from a
+colon word, and every word compiled into a definition, is recorded as
+a fixed-size packed record in a ring buffer: the event kind, the word
+(as an index into a table of names), data stack depth, `inp_pos` and
+the compiling flag. Only the newest records are kept, unless the
+tracer streams to a file, in which case each time the ring fills it is
+written out.
+
+Like profiling, turning tracing on rethreads colon words to wrap their
+calls, so with it off the inner loop is untouched and `execute` pays
+one attribute check.
+
+Trace files can be decoded with:
+
+    $ python3 -m pupforth.trace FILE
+"""
+
+import struct
+import sys
+
+from .words import new_word, rethread
+
+EXEC = 0
+COMPILE = 1
+KINDS = {EXEC: "exec", COMPILE: "compile"}
+
+# kind, word index, stack depth, inp_pos, compiling
+RECORD = struct.Struct("<BIIIB")
+RING_SIZE = 4096
+
+# trace files are a series of chunks: a name for a word index, or records
+_NAME = struct.Struct("<cIH")
+_RECORDS = struct.Struct("<cI")
+
+
+class Tracer:
+    def __init__(self, size=RING_SIZE, file=None):
+        self.size = size
+        self.buf = bytearray(size * RECORD.size)
+        self.count = 0          # records ever made
+        self.flushed = 0        # records written to file
+        self.names = []
+        self.ids = {}           # id(word) -> index in names
+        self.file = file
+
+    def word_index(self, w):
+        i = self.ids.get(id(w))
+        if i is None:
+            i = self.ids[id(w)] = len(self.names)
+            self.names.append(w.name)
+            if self.file:
+                name = w.name.encode()
+                self.file.write(_NAME.pack(b"N", i, len(name)) + name)
+        return i
+
+    def record(self, kind, w, st):
+        RECORD.pack_into(
+            self.buf, self.count % self.size * RECORD.size,
+            kind, self.word_index(w), len(st.stk), st.inp_pos,
+            bool(st.compiling))
+        self.count += 1
+        if self.file and self.count % self.size == 0:
+            self.flush()
+
+    def wrap(self, w, fn):
+        """Return function that records w being run, then runs fn."""
+
+        def traced(st):
+            self.record(EXEC, w, st)
+            fn(st)
+
+        return traced
+
+    def records(self, start=0):
+        """Yield (seq, kind, name, depth, inp_pos, compiling) from start.
+
+        Only the last `size` records are still in the ring.
+        """
+
+        for seq in range(max(start, self.count - self.size), self.count):
+            kind, i, depth, pos, comp = RECORD.unpack_from(
+                self.buf, seq % self.size * RECORD.size)
+            yield seq, kind, self.names[i], depth, pos, comp
+
+    def flush(self):
+        """Write records made since last flush to file."""
+
+        start = max(self.flushed, self.count - self.size)
+        n = self.count - start
+        if not n:
+            return
+        self.file.write(_RECORDS.pack(b"R", n))
+        for seq in range(start, self.count):
+            off = seq % self.size * RECORD.size
+            self.file.write(self.buf[off:off + RECORD.size])
+        self.flushed = self.count
+
+    def close(self):
+        if self.file:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+def format_record(seq, kind, name, depth, pos, comp):
+    return (f"{seq:>8} {KINDS[kind]:8} {name:20} depth={depth:<4} "
+            f"pos={pos:<5}{' compiling' if comp else ''}")
+
+
+def decode_file(path):
+    """Yield records of trace file, as for Tracer.records."""
+
+    with open(path, "rb") as f:
+        data = f.read()
+    names = {}
+    records = []
+    off = 0
+    while off < len(data):
+        tag = data[off:off + 1]
+        if tag == b"N":
+            _, i, n = _NAME.unpack_from(data, off)
+            off += _NAME.size
+            names[i] = data[off:off + n].decode()
+            off += n
+        elif tag == b"R":
+            _, n = _RECORDS.unpack_from(data, off)
+            off += _RECORDS.size
+            records.extend(RECORD.iter_unpack(data[off:off + n * RECORD.size]))
+            off += n * RECORD.size
+        else:
+            raise ValueError(f"Bad trace file at byte {off}")
+    for seq, (kind, i, depth, pos, comp) in enumerate(records):
+        yield seq, kind, names[i], depth, pos, comp
+
+
+def start(st, file=None):
+    stop(st)
+    st.tracer = Tracer(file=file)
+    rethread(st)
+
+
+def stop(st):
+    if st.tracer:
+        st.tracer.close()
+        st.last_trace = st.tracer
+        st.tracer = None
+        rethread(st)
+
+
+@new_word("trace-on")
+def trace_on(st):
+    """( -- ) Start tracing execution into ring buffer."""
+    start(st)
+
+
+@new_word("trace-off")
+def trace_off(st):
+    """( -- ) Stop tracing."""
+    stop(st)
+
+
+@new_word("trace-dump")
+def trace_dump(st):
+    """( -- ) Show records in ring buffer of current or last trace."""
+
+    tracer = st.tracer or st.last_trace
+    if not tracer:
+        print("No trace: use trace-on", file=st.out)
+        return
+    for rec in tracer.records():
+        print(format_record(*rec), file=st.out)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("usage: python3 -m pupforth.trace FILE", file=sys.stderr)
+        return 2
+    for rec in decode_file(sys.argv[1]):
+        print(format_record(*rec))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
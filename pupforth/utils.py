@@ -1,6 +1,8 @@
 """General utilities."""
 import re
 
+from .exceptions import ForthError
+
 # ANSI color codes
 RESET = "\u001b[0m"
 RED = "\u001b[31m"
@@ -8,6 +10,9 @@ GREEN = "\u001b[32m"
 YELLOW = "\u001b[33m"
 BLUE = "\u001b[34m"
 
+_DOCSTRING = re.compile(r"^(\([^)]+\))?(.*)$")
+
+
 def parse_docstring(s, width=25):
     """Parse out the stack effect, if present.
 
@@ -24,27 +29,78 @@ def parse_docstring(s, width=25):
     '( n -- n )   Foo foo'
     """
 
-    RE = re.compile(r"^(\([^)]+\))?(.*)$")
-    mo = RE.match(s)
+    mo = _DOCSTRING.match(s)
     se, text = mo.groups()
     se = se or ""
     text = text.strip()
     return f"""{se:{width}s} {text}"""
 
 
-def to_base_n(decimal_number, base):
-    if decimal_number == 0:
-        return "0"
+_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_PREFIXES = {"$": 16, "#": 10, "%": 2}
+_NUMBER = {}    # base -> compiled regex for a number in that base
+
+
+def _check_base(base):
+    if type(base) is not int or not 2 <= base <= 36:
+        raise ForthError(f"Invalid base: {base!r}")
+
+
+def to_base_n(n, base):
+    """Format int n in base.
 
-    digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    >>> to_base_n(255, 16), to_base_n(-5, 2), to_base_n(0, 8), to_base_n(42, 10)
+    ('FF', '-101', '0', '42')
+    >>> to_base_n(5, 1)
+    Traceback (most recent call last):
+    pupforth.exceptions.ForthError: Invalid base: 1
+    """
+
+    if base == 10:
+        return str(n)
+    _check_base(base)
+    if n == 0:
+        return "0"
+    sign = "-" if n < 0 else ""
+    n = abs(n)
     result = ""
-    while decimal_number > 0:
-        remainder = decimal_number % base
-        result = digits[remainder] + result
-        decimal_number //= base
-    return result
+    while n > 0:
+        n, remainder = divmod(n, base)
+        result = _DIGITS[remainder] + result
+    return sign + result
+
 
+def to_number(tok, base=10):
+    """Convert token to int, or return None if it isn't a number.
+
+    Tokens are in base, unless prefixed by $ (hex), # (decimal) or %
+    (binary); 'c' is the code of character c.
+
+    >>> to_number("42"), to_number("-ff", 16), to_number("$FF"), to_number("%101")
+    (42, -255, 255, 5)
+    >>> to_number("#-10", 16), to_number("'a'")
+    (-10, 97)
+    >>> to_number("dup"), to_number("12a"), to_number("1_000"), to_number("-")
+    (None, None, None, None)
+    >>> to_number(""), to_number("$")
+    (None, None)
+    >>> to_number("10", 0)
+    Traceback (most recent call last):
+    pupforth.exceptions.ForthError: Invalid base: 0
+    """
 
-# decimal_number = 100
-# base_16_number = to_base_n(decimal_number, 2)
-# print(base_16_number)
\ No newline at end of file
+    if not tok:
+        return None
+    if len(tok) == 3 and tok[0] == "'" == tok[2]:
+        return ord(tok[1])
+    if tok[0] in _PREFIXES:
+        base = _PREFIXES[tok[0]]
+        tok = tok[1:]
+    pattern = _NUMBER.get(base) if type(base) is int else None
+    if pattern is None:
+        _check_base(base)
+        pattern = _NUMBER[base] = re.compile(
+            f"-?[{_DIGITS[:base]}{_DIGITS[10:base].lower()}]+")
+    if not pattern.fullmatch(tok):
+        return None
+    return int(tok, base)
@@ -0,0 +1,210 @@
+"""Vector words: bulk operations on regions of data space.
+
+Vectors are runs of cells given as address and count, and are viewed
+in place -- as NumPy arrays when NumPy is installed, else as 'q' casts
+of data space's memoryview, operated on in Python. NumPy is imported
+the first time a vector word needs it, so it costs nothing at startup.
+
+Results are wrapped to 64 bits either way, as NumPy does. Boxed values
+(see memory.py) read as 0, and are dropped where a vector is written;
+the byte words (move, fill, erase) and vcopy carry them along.
+"""
+
+import array
+
+from .exceptions import ForthError
+from .memory import CELL, CELL_MIN
+from .words import new_word
+
+_numpy = False      # not tried to import yet
+
+
+def numpy():
+    """NumPy, or None if it isn't installed."""
+
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy as _numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+
+def _wrap(n):
+    """Wrap int to a signed 64-bit cell."""
+    return (n - CELL_MIN) % 2 ** 64 + CELL_MIN
+
+
+def cells(st, addr, n, write=False):
+    """View n cells from addr, as a NumPy array or 'q' memoryview."""
+
+    mem = st.memory
+    if type(n) is not int or n < 0:
+        raise ForthError(f"Invalid count: {n}")
+    if n:
+        mem.check(addr, n * CELL)
+    if write:
+        mem.unbox(addr, n * CELL)
+    mv = mem.mv[addr:addr + n * CELL]
+    np = numpy()
+    return np.frombuffer(mv, dtype=np.int64) if np else mv.cast("q")
+
+
+def _copy(mem, src, dst, n):
+    """Copy n bytes from src to dst (which may overlap), with boxed values."""
+
+    if not n:
+        return
+    mem.check(src, n)
+    mem.check(dst, n)
+    moved = {a - src + dst: v for a, v in mem.boxed.items() if src <= a < src + n}
+    mem.mv[dst:dst + n] = mem.mv[src:src + n]
+    mem.unbox(dst, n)
+    mem.boxed.update(moved)
+
+
+def _fill(mem, addr, n, c):
+    if type(n) is not int or n < 0:
+        raise ForthError(f"Invalid count: {n}")
+    if n:
+        mem.check(addr, n)
+        mem.mv[addr:addr + n] = bytes([c & 0xFF]) * n
+        mem.unbox(addr, n)
+
+
+@new_word("v+")
+def v_add(st):
+    """( a1 a2 a3 n -- ) Add cells of a1 and a2 into a3."""
+
+    n = st.stk.pop()
+    dst = cells(st, st.stk.pop(), n, write=True)
+    b = cells(st, st.stk.pop(), n)
+    a = cells(st, st.stk.pop(), n)
+    if numpy():
+        numpy().add(a, b, out=dst)
+    else:
+        dst[:] = array.array("q", [_wrap(x + y) for x, y in zip(a, b)])
+
+
+@new_word("v*")
+def v_mul(st):
+    """( a1 a2 a3 n -- ) Multiply cells of a1 and a2 into a3."""
+
+    n = st.stk.pop()
+    dst = cells(st, st.stk.pop(), n, write=True)
+    b = cells(st, st.stk.pop(), n)
+    a = cells(st, st.stk.pop(), n)
+    if numpy():
+        numpy().multiply(a, b, out=dst)
+    else:
+        dst[:] = array.array("q", [_wrap(x * y) for x, y in zip(a, b)])
+
+
+@new_word("vsum")
+def v_sum(st):
+    """( a n -- sum ) Sum of n cells."""
+
+    n = st.stk.pop()
+    a = cells(st, st.stk.pop(), n)
+    st.stk.push(int(a.sum()) if numpy() else _wrap(sum(a)))
+
+
+@new_word("vdot")
+def v_dot(st):
+    """( a1 a2 n -- dot ) Dot product of n cells."""
+
+    n = st.stk.pop()
+    b = cells(st, st.stk.pop(), n)
+    a = cells(st, st.stk.pop(), n)
+    if numpy():
+        st.stk.push(int(numpy().dot(a, b)))
+    else:
+        st.stk.push(_wrap(sum(x * y for x, y in zip(a, b))))
+
+
+@new_word("vfill")
+def v_fill(st):
+    """( a n x -- ) Set n cells to x."""
+
+    x = st.stk.pop()
+    n = st.stk.pop()
+    a = cells(st, st.stk.pop(), n, write=True)
+    if type(x) is not int:
+        raise ForthError(f"Cannot fill with: {x!r}")
+    x = _wrap(x)
+    if numpy():
+        a.fill(x)
+    else:
+        a[:] = array.array("q", [x]) * n
+
+
+@new_word("vcopy")
+def v_copy(st):
+    """( a1 a2 n -- ) Copy n cells from a1 to a2."""
+
+    n = st.stk.pop()
+    if type(n) is not int or n < 0:
+        raise ForthError(f"Invalid count: {n}")
+    dst = st.stk.pop()
+    _copy(st.memory, st.stk.pop(), dst, n * CELL)
+
+
+def _extreme(st, pick):
+    n = st.stk.pop()
+    a = cells(st, st.stk.pop(), n)
+    if not n:
+        raise ForthError("Empty vector")
+    st.stk.push(int(getattr(a, pick.__name__)()) if numpy() else pick(a))
+
+
+@new_word("vmin")
+def v_min(st):
+    """( a n -- min ) Smallest of n cells."""
+    _extreme(st, min)
+
+
+@new_word("vmax")
+def v_max(st):
+    """( a n -- max ) Largest of n cells."""
+    _extreme(st, max)
+
+
+@new_word("vsort")
+def v_sort(st):
+    """( a n -- ) Sort n cells in place, smallest first."""
+
+    n = st.stk.pop()
+    a = cells(st, st.stk.pop(), n, write=True)
+    if numpy():
+        a.sort()
+    else:
+        a[:] = array.array("q", sorted(a))
+
+
+@new_word("move")
+def move(st):
+    """( a1 a2 u -- ) Copy u bytes from a1 to a2."""
+
+    u = st.stk.pop()
+    if type(u) is not int or u < 0:
+        raise ForthError(f"Invalid count: {u}")
+    dst = st.stk.pop()
+    _copy(st.memory, st.stk.pop(), dst, u)
+
+
+@new_word("fill")
+def fill(st):
+    """( a u c -- ) Set u bytes from a to c."""
+
+    c = st.stk.pop()
+    u = st.stk.pop()
+    _fill(st.memory, st.stk.pop(), u, c)
+
+
+@new_word("erase")
+def erase(st):
+    """( a u -- ) Set u bytes from a to 0."""
+
+    u = st.stk.pop()
+    _fill(st.memory, st.stk.pop(), u, 0)
@@ -1,26 +1,66 @@
-"""Infrastructure for Forth words and colon words."""
+"""Infrastructure for Forth words and colon words.
 
-from dataclasses import dataclass
+Word headers have `__slots__`, and a colon word's body is an array of
+tokens, one cell per item, rather than a list of objects: the low two
+bits of a token say whether it is a word (by execution token, its index
+in the dictionary's `xts`), an int that fits in the rest of the cell,
+anything else (a string, a big int) by index into the word's `consts`,
+or an op the optimizer made for a literal and an operator, by index in
+LIT_OPS and the literal. Compiled code is then a flat buffer the garbage
+collector needn't look into; `words` decodes it for whatever needs the
+items.
+"""
+
+from array import array
 from typing import Callable, Self
 
-from .utils import parse_docstring
+from .exceptions import ForthError
+
+_XT, _INT, _CONST, _LIT_OP = 0, 1, 2, 3     # token tags
+_INT_MIN = -2 ** 61                         # ints that fit in a token
+_INT_MAX = 2 ** 61 - 1
+
+# (operator, make) for ops the optimizer makes from a literal and an
+# operator, like `(1 +)`; make(n) is the op's function (see optimize.py)
+LIT_OPS = []
 
 
-@dataclass
 class Word:
-    next_: Self | None
-    name: str
-    doc: str
-    hidden: bool = False
-    compilation: bool = False
-    immediate: bool = True  # not used right now
+    __slots__ = ("next_", "name", "doc", "compilation", "immediate", "xt",
+                 "dependents")
+
+    def __init__(self,
+                 next_: Self | None,
+                 name: str,
+                 doc: str,
+                 compilation: bool = False,
+                 immediate: bool = True):
+        self.next_ = next_
+        self.name = name
+        self.doc = doc
+        self.compilation = compilation
+        self.immediate = immediate  # not used right now
+        self.xt = None              # execution token, once in a dictionary
+        # set of JIT-compiled words that call or inline this one, if any
+        self.dependents = None
 
     def __repr__(self):
         return f"<{self.__class__.__name__} {self.name}>"
 
+    def add_dependent(self, w):
+        """Note that w has code built against this word (see invalidate)."""
+
+        if self.dependents is None:
+            self.dependents = set()
+        self.dependents.add(w)
+
 
 class PrimWord(Word):
-    code: Callable
+    # threader: for words with inline operands (branches), threader(words,
+    # i) makes the op for words[i], which returns the index to continue
+    # at; also for words that leave the loop (exit) or yield (pause),
+    # which have no operand. lit_form: (k, n) if made by lit_op(k, n).
+    __slots__ = ("code", "threader", "operand", "lit_form")
 
     def __init__(self,
                  next_: Word,
@@ -29,15 +69,19 @@ class PrimWord(Word):
                  code: Callable,
                  compilation: bool,
                  immediate: bool):
-        super().__init__(next_, name, doc, False, compilation, immediate)
+        super().__init__(next_, name, doc, compilation, immediate)
         self.code = code
+        self.threader = None
+        self.operand = True
+        self.lit_form = None
 
     def __call__(self, st, *args, **kwargs):
         self.code(st, *args, **kwargs)
 
 
 class ColWord(Word):
-    words: list[Callable | int | str]
+    __slots__ = ("xts", "body", "consts", "_optimized", "inlined", "inline",
+                 "_code", "_jumps", "calls", "jit_source")
 
     def __init__(self,
                  next_: Word,
@@ -45,47 +89,465 @@ class ColWord(Word):
                  doc: str,
                  words: list[Callable | int | str],
                  compilation: bool,
-                 immediate: bool):
-        super().__init__(next_, name, doc, False, compilation, immediate)
-        self.words = words
+                 immediate: bool,
+                 xts: list):
+        super().__init__(next_, name, doc, compilation, immediate)
+        self.xts = xts          # the dictionary's: execution token -> word
+        self.consts = None      # items that don't fit in a token, if any
+        self.body = self._encode(words)
+        self._optimized = None  # tokens of peephole-optimized words, if any
+        self.inlined = ()       # words inlined into optimized
+        self.inline = None      # True/False: always/never inline this
+        self._code = None
+        self._jumps = False
+        self.calls = 0
+        self.jit_source = None
+
+    def _token(self, item):
+        if isinstance(item, Word):
+            xts = self.xts
+            xt = item.xt
+            form = getattr(item, "lit_form", None)
+            if xt is None and form and _INT_MIN >> 2 <= form[1] <= _INT_MAX >> 2:
+                return (form[1] << 2 | form[0]) << 2 | _LIT_OP
+            if xt is None:
+                # an op made by the optimizer, for a literal too big
+                # to go in a token
+                xt = item.xt = len(xts)
+                xts.append(item)
+            elif xt >= len(xts) or xts[xt] is not item:
+                raise ForthError(f"Not in this dictionary: {item.name}")
+            return xt << 2
+        if type(item) is int and _INT_MIN <= item <= _INT_MAX:
+            return item << 2 | _INT
+        if self.consts is None:
+            self.consts = []
+        for i, c in enumerate(self.consts):
+            if c is item:
+                break
+        else:
+            i = len(self.consts)
+            self.consts.append(item)
+        return i << 2 | _CONST
+
+    def _encode(self, items):
+        return array("q", [self._token(x) for x in items])
+
+    def _decode(self, tokens):
+        xts = self.xts
+        consts = self.consts
+        items = []
+        for t in tokens:
+            tag = t & 3
+            if tag == _XT:
+                items.append(xts[t >> 2])
+            elif tag == _INT:
+                items.append(t >> 2)
+            elif tag == _CONST:
+                items.append(consts[t >> 2])
+            else:
+                items.append(lit_op(t >> 2 & 3, t >> 4))
+        return items
+
+    @property
+    def words(self) -> list[Callable | int | str]:
+        """Items of the body as defined: words, literals and operands."""
+        return self._decode(self.body)
+
+    @words.setter
+    def words(self, items):
+        self.body = self._encode(items)
+        self.uninline()
+
+    @property
+    def optimized(self) -> list[Callable | int | str] | None:
+        """Items of the peephole-optimized body, or None (see optimize.py)."""
+        return None if self._optimized is None else self._decode(self._optimized)
+
+    @optimized.setter
+    def optimized(self, items):
+        self._optimized = None if items is None else self._encode(items)
+
+    def append(self, w):
+        """Compile w onto end of definition."""
+
+        self.body.append(self._token(w))
+        self._optimized = None
+        self.inlined = ()
+        self._code = None
+        self.calls = 0
+        self.jit_source = None
+
+    def put(self, at, item):
+        """Replace item at index at (eg to resolve a branch offset)."""
+
+        self.body[at] = self._token(item)
+        self._code = None
+
+    def unjit(self):
+        """Drop JIT code, going back to threaded code."""
+
+        if self.jit_source:
+            self._code = None
+            self.calls = 0
+            self.jit_source = None
+
+    def uninline(self):
+        """Drop optimized code, going back to calling the words inlined."""
+
+        self._optimized = None
+        self.inlined = ()
+        self._code = None
+
+    def compile(self, st):
+        """Thread words into a list of closures, one per item.
+
+        Primitives are called straight through to their Python function,
+        and anything else is a literal that gets pushed. Calls to colon
+        words are ops returning the word, which the inner interpreter
+        (see __call__) enters without recursing. Rebuilt lazily after any
+        `append`. When profiling or tracing, calls to words are wrapped to
+        do that, so colon words are called through their own __call__.
+
+        Branches are made by their word's threader, and their operands
+        become ops that are always jumped over.
+        """
+
+        code, self._jumps = self.thread(st.profiler, st.tracer)
+        self._code = code
+        return code
+
+    def thread(self, prof=None, tracer=None):
+        """Return (threaded code, whether it jumps or calls) (see compile)."""
+
+        body = self.words if self.optimized is None else self.optimized
+        code = []
+        jumps = False
+        for i, w in enumerate(body):
+            if isinstance(w, PrimWord) and w.threader:
+                code.append(w.threader(body, i))
+                jumps = True
+            elif isinstance(w, ColWord) and not (prof or tracer):
+                code.append(_call(w))
+                jumps = True
+            elif isinstance(w, Word):
+                fn = w.code if isinstance(w, PrimWord) else w
+                if prof:
+                    fn = prof.wrap(w, fn)
+                if tracer:
+                    fn = tracer.wrap(w, fn)
+                code.append(fn)
+            else:
+                code.append(_literal(w))
+        return code, jumps
+
+    def count_call(self, st):
+        """Count call for JIT, compiling once hot."""
+
+        self.calls += 1
+        if self.calls >= st.jit:
+            from .jit import jit_word
+            jit_word(self)
 
     def __call__(self, st):
-        for w in self.words:
-            st.stk.push(w)
-            if isinstance(w, Word):
-                print(
-                    f"IN-WRD-CALL ex {st.stk.peek()}, {st.inp_buffer}, "
-                    f"{st.inp_pos}")
-                st.stk.pop()(st)
+        """Run word (see inner)."""
+
+        if (st.jit and self.jit_source is None
+                and not st.profiler and not st.tracer):
+            self.count_call(st)
+        code = self._code
+        if code is None:
+            code = self.compile(st)
+        if not self._jumps:
+            for op in code:
+                op(st)
+            return
+        inner(st, code, 0, len(st.ret_stack))
+
+
+def lit_op(k, n):
+    """Op for operator LIT_OPS[k] with literal n, eg `(1 +)`."""
+
+    op, make = LIT_OPS[k]
+    w = PrimWord(None, f"{n} {op.name}", op.doc, make(n), False, False)
+    w.lit_form = (k, n)
+    return w
+
+
+def inner(st, code, ip, base, top=False):
+    """The inner interpreter: run threaded code from ip.
+
+    Straight-line code just runs each op, but ops can return an index
+    to jump to (branches) or a colon word to call, in which case the
+    return address (code, ip) is pushed onto the return stack and we
+    carry on in the callee, so nested and recursive calls all run in
+    this one loop. A call that is the last op jumps to the callee
+    without pushing anything, and straight-line callees (which can't
+    call further) are just run in place. We're done when we return
+    with the return stack back down to base.
+
+    Ops can also return PAUSE, to yield to other tasks. If top, this is
+    the loop a task is running in (see tasks.py): the return address is
+    pushed and we return True, for the task to go on from there later.
+    Otherwise, other tasks get their turn here and now.
+    """
+
+    rs = st.ret_stack
+    end = len(code)
+    while True:
+        while ip < end:
+            nxt = code[ip](st)
+            if nxt is None:
+                ip += 1
+            elif type(nxt) is int:
+                ip = nxt
+            else:
+                break
+        else:
+            # end of body: return to caller, or we're done
+            if len(rs) == base:
+                return None
+            try:
+                code, ip = rs.pop()
+            except (TypeError, ValueError):
+                raise ForthError("Return stack not balanced")
+            end = len(code)
+            continue
+        if nxt is PAUSE:
+            if top:
+                rs.push((code, ip + 1))
+                return True
+            from .tasks import run_others
+            run_others(st)
+            ip += 1
+            continue
+        # nxt is a colon word to call
+        if st.jit and nxt.jit_source is None:
+            nxt.count_call(st)
+        callee = nxt._code
+        if callee is None:
+            callee = nxt.compile(st)
+        if not nxt._jumps:
+            # straight-line code calls no colon words: just run it
+            for op in callee:
+                op(st)
+            ip += 1
+            continue
+        if ip + 1 < end:
+            rs.push((code, ip + 1))
+        code = callee
+        ip = 0
+        end = len(code)
+
+
+PAUSE = object()    # returned by ops to yield to other tasks (see inner)
+
+
+def _call(w):
+    """Make op that has the inner interpreter call colon word w."""
+    return lambda st: w
+
+
+def _literal(val):
+    """Make closure that pushes val."""
+
+    def lit(st):
+        st.stk.push(val)
+
+    return lit
+
+
+def rethread(st):
+    """Make colon words rebuild threaded code (eg to add/drop wrappers)."""
+
+    cw = st.latest
+    while cw:
+        if isinstance(cw, ColWord):
+            cw.unjit()
+            cw._code = None
+        cw = cw.next_
+
+
+def invalidate(w: Word):
+    """Throw away JIT/inlined code built against w (redefined/forgotten/hidden)."""
+
+    if not w.dependents:
+        return
+    for dep in w.dependents:
+        dep.unjit()
+        if any(x is w for x in dep.inlined):
+            dep.uninline()
+    w.dependents = None
+
+
+class Dictionary:
+    """The words one interpreter can see.
+
+    Words are chained newest first through next_, from `latest`. The
+    index keeps every definition of each name, oldest first, so shadowed
+    words come back into view when a newer one is hidden or forgotten.
+    Whether a word is hidden is kept here, by id, rather than on the word,
+    as primitives are in every dictionary.
+
+    A dictionary made from a parent starts with the parent's words, and
+    shares its index and hidden set until it first changes them, and each
+    list in the index until it changes that. The parent does the same
+    from then on, so neither sees the other's changes. Every State's
+    dictionary is made from PRIMITIVES this way, so making one costs next
+    to nothing.
+
+    `xts` is the table of execution tokens colon bodies are made of: each
+    word added gets the next one. A dictionary starts with a copy of its
+    parent's table (or of xts), so tokens of words it shares mean the
+    same in both. Tokens of forgotten words aren't reused.
+    """
+
+    def __init__(self, parent=None, xts=()):
+        self.latest = parent.latest if parent else None
+        self.index = {}
+        self.hidden = set()
+        self._shared = False
+        self._inherited = {}
+        if parent:
+            parent._share()
+            self._share_from(parent)
+        self.not_found = set()  # tokens known not to name a visible word
+        self.xts = list(parent.xts if parent else xts)
+
+    def _share_from(self, other):
+        self.index = other.index
+        self.hidden = other.hidden
+        self._shared = True
+        self._inherited = other.index
+
+    def _share(self):
+        """Copy before next change, as a child now shares our index."""
+        self._share_from(self)
+
+    def _own(self):
+        """Copy what is shared with the parent, before changing it."""
+
+        if self._shared:
+            self.index = dict(self.index)
+            self.hidden = set(self.hidden)
+            self._shared = False
+
+    def _defs(self, name):
+        """Definitions of name, copied first if shared with the parent."""
+
+        self._own()
+        defs = self.index.setdefault(name, [])
+        if defs is self._inherited.get(name):
+            defs = self.index[name] = defs[:]
+        return defs
+
+    def register(self, w: Word, xt=None):
+        """Give w execution token xt (default: the next), unless it has one.
+
+        Tokens skipped over to reach xt are left unused.
+        """
+
+        if w.xt is not None:
+            return
+        xts = self.xts
+        if xt is None:
+            xt = len(xts)
+        elif xt < len(xts) and xts[xt] is not None:
+            raise ForthError(f"Execution token {xt} already taken")
+        xts.extend([None] * (xt + 1 - len(xts)))
+        xts[xt] = w
+        w.xt = xt
+
+    def word_at(self, xt) -> Word:
+        """Word with execution token xt."""
+
+        w = self.xts[xt] if type(xt) is int and 0 <= xt < len(self.xts) else None
+        if w is None:
+            raise ForthError(f"Not an execution token: {xt}")
+        return w
+
+    def link(self, w: Word):
+        """Make w the newest word in the dictionary and index it by name."""
+
+        self.register(w)
+        defs = self._defs(w.name)
+        for old in defs:
+            invalidate(old)
+        self.not_found.discard(w.name)
+        self.latest = w
+        defs.append(w)
+
+    def lookup(self, name: str, find_hidden=False) -> Word | None:
+        """Find newest word called name, skipping hidden ones unless asked."""
+
+        for w in reversed(self.index.get(name, ())):
+            if find_hidden or id(w) not in self.hidden:
+                return w
+        return None
+
+    def unlink_through(self, w: Word):
+        """Forget w and every word defined after it."""
+
+        cur = self.latest
+        while cur is not w.next_:
+            invalidate(cur)
+            defs = self._defs(cur.name)
+            defs.pop()
+            if not defs:
+                del self.index[cur.name]
+            self.hidden.discard(id(cur))
+            if self.xts[cur.xt] is cur:
+                self.xts[cur.xt] = None
+            cur = cur.next_
+        self.latest = w.next_
+
+    def is_hidden(self, w: Word) -> bool:
+        return id(w) in self.hidden
+
+    def hide(self, w: Word):
+        self._own()
+        self.hidden.add(id(w))
+        invalidate(w)
+
+    def unhide(self, w: Word):
+        self._own()
+        self.hidden.discard(id(w))
+        self.not_found.discard(w.name)
+
+
+PRIMITIVES = Dictionary()   # every State's dictionary starts from this
 
 
 def new_word(name=None, compilation=False, immediate=True):
     def decorator(func):
         nf = PrimWord(
-            next_=new_word.latest,
+            next_=PRIMITIVES.latest,
             name=name or func.__name__,
-            doc=parse_docstring(func.__doc__ or ""),
+            doc=func.__doc__ or "",
             compilation=compilation,
             immediate=immediate,
             code=func,
         )
-        new_word.latest = nf
+        new_word.prims[nf.name] = nf
+        PRIMITIVES.link(nf)
         return nf
 
     return decorator
 
 
-new_word.latest = None
+new_word.prims = {}     # all primitives by name, even if forgotten
 
 
-def new_col(name, wordlist: list[Callable | int | str], doc="", compilation=False, immediate=True):
+def new_col(dictionary: Dictionary, name, wordlist: list[Callable | int | str], doc="",
+            compilation=False, immediate=True):
     nf = ColWord(
-        next_=new_word.latest,
+        next_=dictionary.latest,
         name=name,
-        doc=parse_docstring(doc),
+        doc=doc,
         words=wordlist,
         compilation=compilation,
         immediate=immediate,
+        xts=dictionary.xts,
     )
-    new_word.latest = nf
+    dictionary.link(nf)
     return nf
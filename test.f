@@ -8,9 +8,11 @@ s" test.f running ===============" tell cr
 : postpone immediate word find , ;
 : ['] postpone ' ;
 
-\ create : made in forth, so we don't need the primitive
+\ create & , lay out data in memory
 
-create : -1 compiling! create -1 compiling! ;
+create squares 1 , 4 , 9 , 16 ,
+squares 2 cells + @ .
+life @ .
 : aa 1 2 + . ;
 aa
 
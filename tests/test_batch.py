@@ -0,0 +1,43 @@
+"""Jobs that profile or trace leave no wrappers on shared words."""
+
+from pupforth import batch
+from pupforth.main import State, process
+
+
+def test_profiling_job_not_seen_by_next(tmp_path, monkeypatch):
+    base = State()
+    process(base, ": 2dup swap dup rot dup ;")
+    monkeypatch.setattr(batch, "_base", base)
+    for words in ("profile-on 2dup", "trace-on 2dup", "profile-on 2dup forget 2dup"):
+        job = tmp_path / "job.f"
+        job.write_text(f"1 2 {words}")
+        assert batch.run_job(str(job))["exit"] == batch.EXIT_OK
+
+        st = base.spawn()
+        process(st, "1 2 2dup")
+        code = st.dictionary.lookup("2dup")._code
+        assert all(op.__qualname__.split(".")[0] not in ("Profiler", "Tracer")
+                   for op in code)
+
+
+def test_jobs_leave_base_words_alone(tmp_path, monkeypatch):
+    base = State()
+    process(base, ": sq dup * ; : quad sq sq ; noinline")
+    monkeypatch.setattr(batch, "_base", base)
+    sq = base.dictionary.lookup("sq")
+    quad = base.dictionary.lookup("quad")
+    process(base.spawn(), "2 quad")
+    optimized = quad.optimized
+    assert any(w is sq for w in quad.inlined)
+
+    for words in ("inline", "' sq hide sq : sq 0 ;",
+                  "jit-on : go 100 0 do 3 quad drop loop ; go"):
+        job = tmp_path / "job.f"
+        job.write_text(words)
+        assert batch.run_job(str(job))["exit"] == batch.EXIT_OK
+
+        assert quad.inline is False and quad.jit_source is None
+        assert quad.optimized == optimized
+        st = base.spawn()
+        process(st, "2 quad")
+        assert list(st.stk) == [16]
@@ -0,0 +1,52 @@
+"""Files replayed from the cache see what earlier files did."""
+
+from pupforth import cache
+from pupforth.main import State, process
+
+
+def _run(files):
+    st = State()
+    for text in files:
+        cache.load_source(st, text)
+    process(st, "ten")
+    return st.stk.pop()
+
+
+def test_key_covers_earlier_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    b = "five 2 * constant ten"
+    assert _run([": five 5 ;", b]) == 10
+    assert _run([": five 5 ;", b]) == 10
+    assert cache.stats["hits"] >= 2
+    assert _run([": five 6 ;", b]) == 12
+
+
+def test_key_covers_data_space(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    b = "x @ constant ten"
+    assert _run(["variable x 10 x !", b]) == 10
+    assert _run(["variable x 11 x !", b]) == 11
+
+
+def test_files_with_effects_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    img = tmp_path / "img"
+    for text in (": f 1 ; jit-on", f": f 1 ; save-image {img}"):
+        for _ in range(2):
+            img.unlink(missing_ok=True)
+            st = State()
+            cache.load_source(st, text)
+        assert st.jit or img.exists()
+
+
+def test_bad_entry_interpreted_instead(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    text = ": five 5 ; five 2 * constant ten"
+    assert _run([text]) == 10
+    (entry,) = tmp_path.glob("*.fc")
+    d = cache.marshal.loads(entry.read_bytes())
+    d["words"].append(("c", "bogus"))
+    del d["boxed"]
+    entry.write_bytes(cache.marshal.dumps(d))
+    assert _run([text]) == 10
+    assert cache.marshal.loads(entry.read_bytes()) != d
@@ -0,0 +1,30 @@
+"""Compiled control flow: branches and do loops, nested and left early."""
+
+import pytest
+
+from pupforth.main import State, process
+
+CASES = [
+    (": t if 1 else 2 then ;", "0 t -1 t", [2, 1]),
+    (": t begin dup 1 + dup 5 = until ;", "0 t", [0, 1, 2, 3, 4, 5]),
+    (": t begin dup 3 < while 1 + repeat ;", "0 t", [3]),
+    (": t 3 0 do 2 0 do j 10 * i + loop loop ;", "t", [0, 1, 10, 11, 20, 21]),
+    (": t 10 0 do i 3 +loop ;", "t", [0, 3, 6, 9]),
+    (": t 0 10 do i -4 +loop ;", "t", [10, 6, 2]),
+    (": t 0 4 do i -1 +loop ;", "t", [4, 3, 2, 1, 0]),
+    (": t 0 0 ?do i loop 7 ;", "t", [7]),
+    (": t 10 0 do i dup 2 = if leave then loop 99 ;", "t", [0, 1, 2, 99]),
+    (": t 3 0 do 10 0 do i 1 = if leave then j loop loop ;", "t", [0, 1, 2]),
+    (": t 5 0 do i 3 = if i unloop exit then loop 99 ;", "t 42", [3, 42]),
+    (": t 3 0 do 3 0 do i j + 3 = if i j unloop unloop exit then loop loop ;",
+     "t", [2, 1]),
+]
+
+
+@pytest.mark.parametrize("src,run,stack", CASES, ids=[c[0] for c in CASES])
+def test_control_flow(src, run, stack):
+    st = State()
+    process(st, src)
+    process(st, run)
+    assert list(st.stk) == stack
+    assert not st.ret_stack
@@ -0,0 +1,17 @@
+"""Images keep execution tokens, so ones stored in data space still work."""
+
+from pupforth.image import save_image, load_image
+from pupforth.main import State, process
+
+
+def test_xts_survive_round_trip(tmp_path):
+    st = State()
+    process(st, ": a 1 ; : b 2 ; forget a : c 3 ; : d 4 ; variable v ' d v !")
+    process(st, "' d")
+    xt = st.stk.pop()
+    save_image(st, str(tmp_path / "img"))
+
+    st = State()
+    load_image(st, str(tmp_path / "img"))
+    process(st, "' d v @ execute : e 5 ; ' e")
+    assert list(st.stk) == [xt, 4, xt + 2]
@@ -0,0 +1,25 @@
+"""Writes to >in take effect before the next word is read."""
+
+from pupforth.main import State, process, process_source
+
+
+def test_skip_rest_of_line():
+    st = State()
+    process_source(st, "1 100 >in ! 2\n3")
+    assert list(st.stk) == [1, 3]
+
+
+def test_rescan_line():
+    st = State()
+    process(st, "variable k")
+    process(st, ": again? k @ 3 < if k @ 1 + k ! 0 >in ! then ;")
+    process(st, "k @ again?")
+    assert list(st.stk) == [0, 1, 2, 3]
+
+
+def test_include_keeps_outer_in(tmp_path):
+    inner = tmp_path / "inner.f"
+    inner.write_text(">in @ drop 1 drop\n")
+    st = State()
+    process(st, f">in @ drop include {inner} 7")
+    assert list(st.stk) == [7]
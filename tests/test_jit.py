@@ -0,0 +1,104 @@
+"""JIT-compiled words must leave the same stack as threaded ones."""
+
+import pytest
+
+from pupforth.main import State, process
+from pupforth.jit import INLINE, JIT_THRESHOLD, generate, jit_word
+from pupforth.words import PRIMITIVES
+
+ARGS = [(2, 5, 3), (5, 2, 3), (4, 4, 4), (-1, 0, 1)]
+
+
+def _prims():
+    w = PRIMITIVES.latest
+    while w:
+        if getattr(w, "code", None) in INLINE:
+            yield w
+        w = w.next_
+
+
+def _run(st, cw, args):
+    st.stk.clear()
+    for n in args:
+        st.stk.push(n)
+    cw(st)
+    return list(st.stk)
+
+
+@pytest.mark.parametrize("prim", list(_prims()), ids=lambda w: w.name)
+def test_inline_matches_threaded(prim):
+    st = State()
+    process(st, f": t {prim.name} ;")
+    cw = st.dictionary.lookup("t")
+    n_in = len(INLINE[prim.code][0].split())
+    threaded = [_run(st, cw, args[:n_in]) for args in ARGS]
+    jit_word(cw)
+    assert cw.jit_source
+    assert [_run(st, cw, args[:n_in]) for args in ARGS] == threaded
+
+
+def test_every_inline_entry_tested():
+    assert {w.code for w in _prims()} == set(INLINE)
+
+
+def test_optimized_body_matches_threaded():
+    st = State()
+    process(st, ": sq dup * ; : quad sq sq ;")
+    process(st, ": t dup quad swap sq + 1 + 2 < ;")
+    cw = st.dictionary.lookup("t")
+    assert cw.optimized is not None
+    assert generate(cw)[2] == ["jit_t"]     # all inlined: one function
+    threaded = [_run(st, cw, args[:1]) for args in ARGS]
+    jit_word(cw)
+    assert [_run(st, cw, args[:1]) for args in ARGS] == threaded
+
+
+def test_task_can_pause_in_callee_of_jit_word():
+    st = State()
+    for line in [
+            "variable n",
+            ": step  n @ 1 + n ! pause ;",
+            ": body  dup 1 + swap drop step ; noinline",
+            ": run   0 begin body again ;",
+            "jit-on",
+            "task: t1",
+            "' run t1 activate",
+            ": many  200 0 do pause loop ;",
+            "many"]:
+        process(st, line)
+    assert st.dictionary.lookup("body").jit_source
+    process(st, "n @")
+    assert list(st.stk) == [200]
+
+
+JUMPS = [
+    (": t dup 2 < if exit then dup 1- t swap 2- t + ;", [(1,), (2,), (9,)]),
+    (": t dup if 1- else 10 + then 3 * ;", [(0,), (4,), (-2,)]),
+    (": t 0 swap 0 ?do i dup * + loop ;", [(0,), (1,), (6,)]),
+    (": t 0 begin over over > while 1+ repeat nip ;", [(0,), (3,), (-1,)]),
+    (": t 1 begin 2 * dup 100 > until ;", [()]),
+    (": t 5 0 do i 3 = if i unloop exit then loop 0 ;", [()]),
+]
+
+
+@pytest.mark.parametrize("src,cases", JUMPS, ids=[s for s, _ in JUMPS])
+def test_jumps_match_threaded(src, cases):
+    st = State()
+    process(st, ": 1- -1 + ; : 2- -2 + ; : over swap dup rot swap ; : 1+ 1 + ; : nip swap drop ;")
+    process(st, src)
+    cw = st.dictionary.lookup("t")
+    threaded = [_run(st, cw, args) for args in cases]
+    process(st, "jit-on")
+    for _ in range(JIT_THRESHOLD):
+        _run(st, cw, cases[0])
+    assert cw.jit_source
+    assert [_run(st, cw, args) for args in cases] == threaded
+
+
+def test_jumps_left_threaded_if_nothing_to_gain():
+    st = State()
+    process(st, ": t 0 ?do i loop ;")
+    cw = st.dictionary.lookup("t")
+    jit_word(cw)
+    assert cw.jit_source == ""
+    assert _run(st, cw, (3,)) == [0, 1, 2]
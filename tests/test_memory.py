@@ -0,0 +1,32 @@
+"""Writing into a boxed cell, even partly, drops the boxed value."""
+
+import pytest
+
+from pupforth.memory import CELL, DataSpace
+
+
+@pytest.mark.parametrize("write", [
+    lambda m: m.cstore(3, 7),
+    lambda m: m.cstore(0, 7),
+    lambda m: m.store(4, 7),
+    lambda m: m.store(0, 7),
+])
+def test_overwrite_drops_boxed(write):
+    m = DataSpace()
+    m.allot(4 * CELL)
+    m.store(0, "hi")
+    write(m)
+    assert m.fetch(0) != "hi"
+    assert not m.boxed
+
+
+def test_unaligned_box_drops_overlapped():
+    m = DataSpace()
+    m.allot(4 * CELL)
+    m.store(CELL, "a")
+    m.store(CELL + 4, "b")
+    assert m.boxed == {CELL + 4: "b"}
+    for a in range(3 * CELL, 3 * CELL + 20):     # enough to look up by range
+        m.boxed[a + 100] = a
+    m.cstore(CELL + 9, 1)
+    assert CELL + 4 not in m.boxed
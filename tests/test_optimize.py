@@ -0,0 +1,44 @@
+"""The peephole optimizer folds code and keeps branches going where they did."""
+
+import io
+
+import pytest
+
+from pupforth.main import State, process
+from pupforth.output import Output
+
+
+def _see(src, name="t"):
+    out = io.StringIO()
+    st = State(out=Output(out))
+    process(st, src)
+    process(st, f"see {name}")
+    st.out.flush()
+    return st, out.getvalue().split("Optimized:\n")[1].splitlines()[0]
+
+
+@pytest.mark.parametrize("src,optimized", [
+    (": t 2 3 + 4 * ;", "[20]"),
+    (": t swap swap dup drop 0 + ;", "[]"),
+    (": t 8 negate 5 drop ;", "[-8]"),
+    (": t 1 + ;", "[<PrimWord 1 +>]"),
+    (": k 7 ; : t k k * ;", "[49]"),
+])
+def test_folding(src, optimized):
+    _, seen = _see(src)
+    assert seen == optimized
+
+
+def test_branch_targets_remapped():
+    st, seen = _see(": t 2 3 + drop swap swap if 4 8 * else 0 then dup drop ;")
+    assert seen == "[<PrimWord 0branch>, 4, 32, <PrimWord branch>, 2, 0]"
+    process(st, "0 t -1 t")
+    assert list(st.stk) == [0, 32]
+
+
+def test_nothing_merged_across_target():
+    # `1 +` at the loop's start is jumped to, so isn't folded with `0`
+    st, seen = _see(": t 0 begin 1 + dup 3 = until ;")
+    assert seen.startswith("[0, <PrimWord 1 +>")
+    process(st, "t")
+    assert list(st.stk) == [3]
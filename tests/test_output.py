@@ -0,0 +1,55 @@
+"""Output is written to a TTY at once, and to anything else in big pieces."""
+
+import io
+
+import pytest
+
+from pupforth.exceptions import ForthError
+from pupforth.main import State, process
+from pupforth.output import Output
+
+
+class Sink(io.StringIO):
+    def __init__(self, tty):
+        super().__init__()
+        self.tty = tty
+        self.writes = []
+
+    def isatty(self):
+        return self.tty
+
+    def write(self, s):
+        self.writes.append(s)
+        return super().write(s)
+
+
+def test_not_tty_waits_for_flush():
+    sink = Sink(tty=False)
+    st = State(out=Output(sink))
+    process(st, "1 . 2 . cr 3 .")
+    assert sink.writes == []
+    process(st, "flush")
+    assert sink.writes == ["1 2 \n3 "]
+
+
+def test_not_tty_writes_when_full():
+    sink = Sink(tty=False)
+    st = State(out=Output(sink, size=8))
+    process(st, "1 . 2 . 3 . 4 . 5 .")
+    assert sink.writes == ["1 2 3 4 "]
+
+
+def test_tty_writes_at_newline_and_end_of_line():
+    sink = Sink(tty=True)
+    st = State(out=Output(sink))
+    process(st, "1 . cr 2 .")
+    assert sink.writes == ["1 \n", "2 "]
+
+
+@pytest.mark.parametrize("tty", [False, True])
+def test_error_flushes(tty):
+    sink = Sink(tty)
+    st = State(out=Output(sink))
+    with pytest.raises(ForthError):
+        process(st, "1 . nosuchword", show_traceback=False)
+    assert sink.getvalue() == "1 "
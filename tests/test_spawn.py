@@ -0,0 +1,30 @@
+"""Spawned States share words copy-on-write, both ways."""
+
+from pupforth.main import State, process
+
+
+def _body(st, name):
+    return st.dictionary.lookup(name).words
+
+
+def test_parent_changes_not_seen_by_child():
+    parent = State()
+    process(parent, ": sq dup * ;")
+    child = parent.spawn()
+    process(parent, ": sq 99 ; : new 1 ; hide dup")
+    assert _body(child, "sq")[0].name == "dup"
+    assert child.dictionary.lookup("new") is None
+    assert child.dictionary.lookup("dup") is not None
+    assert _body(parent, "sq") == [99]
+    assert parent.dictionary.lookup("dup") is None
+
+
+def test_child_changes_not_seen_by_parent():
+    parent = State()
+    process(parent, ": sq dup * ;")
+    child = parent.spawn()
+    process(child, ": sq 7 ; : new 1 ; hide dup")
+    assert _body(parent, "sq")[0].name == "dup"
+    assert parent.dictionary.lookup("new") is None
+    assert parent.dictionary.lookup("dup") is not None
+    assert State().dictionary.lookup("dup") is not None
@@ -0,0 +1,27 @@
+"""CellStack grows as needed, up to its limit, like a list stack."""
+
+import pytest
+
+from pupforth.exceptions import StackOverflow
+from pupforth.main import State, process
+from pupforth.stack import CellStack, Stack
+
+
+def test_grows_to_limit():
+    stk = CellStack(4, max_cells=8)
+    for n in range(7):
+        stk.push(n)
+    stk.push("boxed")
+    assert list(stk) == [0, 1, 2, 3, 4, 5, 6, "boxed"]
+    with pytest.raises(StackOverflow):
+        stk.push(8)
+    stk.sp = 2
+    assert list(stk) == [0, 1]
+
+
+@pytest.mark.parametrize("stack_class", [Stack, CellStack])
+def test_deep_recursion(stack_class):
+    st = State(stack_class)
+    process(st, ": sum dup if dup -1 + sum + then ;")
+    process(st, "20000 sum")
+    assert list(st.stk) == [20000 * 20001 // 2]
@@ -0,0 +1,12 @@
+"""pupforth-run starts fast, without what only the interactive CLI needs."""
+
+from benchmarks.startup import BUDGET_MS, FORBIDDEN, import_profile
+
+SLACK = 3       # loose: tests share the machine with whatever else runs
+
+
+def test_startup_imports_and_budget():
+    profiles = [import_profile() for _ in range(3)]
+    loaded = {name.split(".")[0] for name in profiles[0][1]}
+    assert not FORBIDDEN & loaded
+    assert min(ms for ms, _ in profiles) < BUDGET_MS * SLACK
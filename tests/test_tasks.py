@@ -0,0 +1,68 @@
+"""Tasks take turns at pause, sleep at stop and go on when woken."""
+
+import io
+
+from pupforth.main import State, process
+from pupforth.output import Output
+
+
+def _state(*lines):
+    st = State(out=Output(io.StringIO()))
+    process(st, ": 1+ 1 + ; : +! dup @ rot + swap ! ; variable ticks")
+    for line in lines:
+        process(st, line)
+    return st
+
+
+def _ticks(st):
+    process(st, "ticks @")
+    return st.stk.pop()
+
+
+def test_pause_round_robin():
+    st = _state(
+        "variable log",
+        ": ticker begin 1 ticks +! pause again ;",
+        ": logger begin log @ 10 * ticks @ + log ! pause again ;",
+        "task: t1 task: t2",
+        "' ticker t1 activate ' logger t2 activate",
+        "pause pause")
+    assert _ticks(st) == 2
+    process(st, "log @")
+    assert st.stk.pop() == 12    # t2 ran after t1 each turn: 1, then 1*10+2
+    assert not st.stk
+
+
+def test_stop_and_wake():
+    st = _state(
+        ": waiter begin 1 ticks +! stop again ;",
+        "task: t1",
+        "' waiter t1 activate",
+        "pause pause pause")
+    assert _ticks(st) == 1
+    process(st, "t1 wake pause pause t1 wake pause")
+    assert _ticks(st) == 3
+
+
+def test_task_ends_and_run_tasks():
+    st = _state(
+        ": counter 3 0 do 1 ticks +! pause loop ;",
+        "task: t1",
+        "' counter t1 activate",
+        "run-tasks")
+    assert _ticks(st) == 3
+    process(st, "t1 wake run-tasks")
+    assert _ticks(st) == 3      # ended: wake does nothing
+    process(st, "' counter t1 activate run-tasks")
+    assert _ticks(st) == 6
+
+
+def test_error_ends_only_that_task():
+    st = _state(
+        ": bad pause drop ;",
+        ": good begin 1 ticks +! pause again ;",
+        "task: t1 task: t2",
+        "' bad t1 activate ' good t2 activate pause pause pause")
+    assert _ticks(st) == 3
+    st.out.flush()
+    assert st.out.sink.getvalue() == "Task t1: Stack underflow\n"
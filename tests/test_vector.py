@@ -0,0 +1,49 @@
+"""Vector words give the same results with NumPy and without it."""
+
+import pytest
+
+from pupforth import vector
+from pupforth.main import State, process
+
+
+@pytest.fixture(params=["numpy", "memoryview"])
+def st(request, monkeypatch):
+    if request.param == "numpy":
+        monkeypatch.setattr(vector, "_numpy", pytest.importorskip("numpy"))
+    else:
+        monkeypatch.setattr(vector, "_numpy", None)
+    st = State()
+    process(st, "create a 3 , 1 , 2 , create b 10 , 20 , 30 , create c 0 , 0 , 0 ,")
+    return st
+
+
+def _cells(st, name, n=3):
+    process(st, name)
+    addr = st.stk.pop()
+    return [st.memory.fetch(addr + 8 * i) for i in range(n)]
+
+
+def test_arithmetic(st):
+    process(st, "a b c 3 v+")
+    assert _cells(st, "c") == [13, 21, 32]
+    process(st, "a b c 3 v*")
+    assert _cells(st, "c") == [30, 20, 60]
+    process(st, "a 3 vsum a b 3 vdot a 3 vmin a 3 vmax")
+    assert list(st.stk) == [6, 110, 1, 3]
+
+
+def test_in_place(st):
+    process(st, "a 3 vsort")
+    assert _cells(st, "a") == [1, 2, 3]
+    process(st, "c 2 -7 vfill b c 8 + 2 vcopy")
+    assert _cells(st, "c") == [-7, 10, 20]
+
+
+def test_wraps_to_cell(st):
+    process(st, "c 1 9223372036854775807 vfill c a c 1 v+")
+    assert _cells(st, "c", 1) == [-2 ** 63 + 2]
+
+
+def test_write_drops_boxed(st):
+    process(st, 's" hi" c !  c 1 5 vfill')
+    assert _cells(st, "c", 1) == [5]